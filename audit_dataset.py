@@ -7,141 +7,285 @@ Checks for:
 3. Overly long assistant responses (>80 words for non-code)
 4. Assistant turns with no Pokkit voice markers
 
+The per-turn measurements come from dataset_features.turn_features(), the
+same records eval_model.py scores and clean_dataset.py categorizes with, so
+the report also includes the composition breakdown at no extra scan.
+
+The checks run per example in a process pool (dataset_parallel.py); results
+come back in file order, so reports and purged output don't depend on the
+worker count.
+
+--cache FILE keeps results across runs, keyed by a hash of each example's
+messages. After appending new data (cat data/train.jsonl data/llm_train.jsonl
+> ...), a rerun with the same cache file only checks the examples it hasn't
+seen; the rest come from the cache. Without --cache nothing is written
+besides --purge output.
+
 Usage:
     python audit_dataset.py --input data/train.jsonl --report
     python audit_dataset.py --input data/train.jsonl --purge --output data/train_clean.jsonl
+    python audit_dataset.py --input data/train.jsonl --report --workers 8
+    python audit_dataset.py --input data/train.jsonl --report --cache ~/.cache/pokkit/audit.cache
 """
 
-import json
-import re
 import argparse
+import hashlib
+import importlib.util
+import os
+import struct
+from array import array
+from bisect import bisect_left
 from pathlib import Path
-from collections import defaultdict
-
-BANNED_PHRASES = [
-    "of course!",
-    "absolutely!",
-    "certainly!",
-    "sure thing!",
-    "happy to help",
-    "great question",
-    "no problem!",
-    "you got it!",
-    "i'd be happy to",
-    "i'm here for you",
-    "is there anything else",
-    "let me know if you need",
-    "i understand that",
-    "as an ai",
-    "i hope this helps",
-    "feel free to",
-    "don't hesitate to",
-    "of course, i",
-    "absolutely, i",
-    "great, i",
-    "sure, i",
-]
-
-def get_assistant_turns(example):
-    msgs = example.get("messages", [])
-    return [m["content"] for m in msgs if m["role"] == "assistant" and m.get("content")]
+from collections import Counter, defaultdict
+from functools import lru_cache, partial
+from dataset_dedup import FingerprintSet
+from dataset_io import JsonlWriter, dumps, encode_example, is_compact, loads
+from dataset_parallel import map_examples
+from dataset_features import CATEGORIES, assistant_turns, categorize, turn_features
 
 def has_banned_phrase(text):
-    lower = text.lower()
-    return [p for p in BANNED_PHRASES if p in lower]
+    return turn_features(text).hits.get("banned", [])
 
 def count_questions(text):
-    # Count ? not inside code blocks
-    no_code = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-    return no_code.count('?')
+    return turn_features(text).questions  # ? outside code blocks
 
 def word_count(text):
-    return len(text.split())
+    return turn_features(text).words
 
 def has_code_block(text):
-    return '```' in text
+    return turn_features(text).code_blocks > 0
 
 def is_too_long(text):
-    if has_code_block(text):
-        return False  # code examples can be long
-    return word_count(text) > 100
+    f = turn_features(text)
+    return not f.code_blocks and f.words > 100  # code examples can be long
 
 def has_voice_markers(text):
-    return any(m in text for m in ['🐸', '!!', 'ribbit', 'croak', 'frog'])
+    return "voice_markers" in turn_features(text).hits
 
 def audit_example(example):
     issues = []
-    turns = get_assistant_turns(example)
-    for turn in turns:
-        if not turn:
-            continue
-        banned = has_banned_phrase(turn)
+    for turn in assistant_turns(example):
+        f = turn_features(turn)
+        banned = f.hits.get("banned")
         if banned:
             issues.append(('banned_phrase', banned[0]))
-        qs = count_questions(turn)
-        if qs > 1:
-            issues.append(('multiple_questions', qs))
-        if is_too_long(turn):
-            issues.append(('too_long', word_count(turn)))
+        if f.questions > 1:
+            issues.append(('multiple_questions', f.questions))
+        if not f.code_blocks and f.words > 100:
+            issues.append(('too_long', f.words))
     return issues
 
+# ── Audit cache ───────────────────────────────────────────────────────────
+#
+# A 16-byte header (magic + hash of the checking code), then one record per
+# audited example, appended as results come in: 64-bit content key, category
+# id, length of the issues JSON, and the issues JSON (empty when clean).
+# Editing the checks (this file, dataset_features.py, dataset_phrases.py)
+# changes the header, and the cache starts over.
+
+CACHE_MAGIC = b"PKAUDIT1"
+CACHE_RECORD = struct.Struct("<QBH")  # key, category id (index into CATEGORIES), issues length
+
+def _checks_hash():
+    h = hashlib.blake2b(digest_size=8)
+    for path in (__file__, importlib.util.find_spec("dataset_features").origin,
+                 importlib.util.find_spec("dataset_phrases").origin):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.digest()
+
+@lru_cache(maxsize=256)
+def _prompt_digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+def content_key(example):
+    """64-bit key of what the checks read: each message's role, content and
+    whether it calls tools. (System prompts repeat, so each is hashed once.)"""
+    h = hashlib.blake2b(digest_size=8)
+    for m in example.get("messages", []):
+        content = m.get("content") or ""
+        if m["role"] == "system":
+            h.update(b"system " + _prompt_digest(content))
+        else:
+            h.update(("%s %d %d:%s" % (m["role"], bool(m.get("tool_calls")), len(content), content)).encode("utf-8"))
+    return int.from_bytes(h.digest(), "little")
+
+class AuditCache:
+    """Audit results by content key, read from `path`; new results are appended to it.
+
+    `table` is the lookup the workers get: (sorted keys, category ids in the
+    same order, {key: issues} for the contaminated ones).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = CACHE_MAGIC + _checks_hash()
+        results = self._read(header)
+        if results is None:  # no cache yet, or one written by other checks
+            with open(path, "wb") as f:
+                f.write(header)
+            results = {}
+        keys = array("Q", sorted(results))
+        self.table = (keys, bytes(results[k][0] for k in keys),
+                      {k: [tuple(i) for i in loads(issues)] for k, (_, issues) in results.items() if issues})
+        self._written = FingerprintSet()
+        self._f = open(path, "ab")
+
+    def __len__(self):
+        return len(self.table[0])
+
+    def _read(self, header):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if data[:len(header)] != header:
+            return None
+        results = {}
+        pos = end = len(header)
+        while pos + CACHE_RECORD.size <= len(data):
+            key, category, size = CACHE_RECORD.unpack_from(data, pos)
+            pos += CACHE_RECORD.size
+            if pos + size > len(data):
+                break
+            results[key] = (category, data[pos:pos + size])
+            pos = end = pos + size
+        if end < len(data):  # torn final record: cut it so appends stay aligned
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        return results
+
+    def add(self, key, category, issues):
+        if not self._written.add(key):
+            return
+        payload = dumps([list(i) for i in issues]) if issues else b""
+        self._f.write(CACHE_RECORD.pack(key, CATEGORIES.index(category), len(payload)) + payload)
+
+    def close(self):
+        self._f.close()
+
+_cache = None  # AuditCache.table, in each worker
+
+def _set_cache(table):
+    global _cache
+    _cache = table
+
+def _cached(key):
+    keys, categories, flagged = _cache
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        return flagged.get(key, []), CATEGORIES[categories[i]]
+    return None
+
+def audit_record(example, purge=False, compact=False):
+    """(content key, whether the checks ran, issues, composition category, (user msg,
+    assistant msg) sample or None, encoded example or None) for one example.
+
+    Runs in the worker processes. Examples in the cache aren't checked again;
+    without a cache the key is None. The example itself comes back only when
+    purging and clean.
+    """
+    key = hit = None
+    if _cache is not None:
+        key = content_key(example)
+        hit = _cached(key)
+    if hit is None:
+        issues, category = audit_example(example), categorize(example)
+    else:
+        issues, category = hit
+    if issues:
+        msgs = example.get("messages", [])
+        user_msg = next((m["content"] for m in msgs if m["role"] == "user"), "(no user msg)")
+        asst_msg = next((m["content"] for m in msgs if m["role"] == "assistant" and m.get("content")), "")
+        return key, hit is None, issues, category, (user_msg[:80], asst_msg[:120]), None
+    return key, hit is None, issues, category, None, encode_example(example, compact) if purge else None
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", default="data/train.jsonl")
     parser.add_argument("--report", action="store_true", help="Print report only")
     parser.add_argument("--purge", action="store_true", help="Remove contaminated examples")
     parser.add_argument("--output", default="data/train_clean.jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the checks (default: one per CPU)")
+    parser.add_argument("--cache", default=None, help="Audit cache file to read and extend (default: no cache)")
     args = parser.parse_args()
 
-    examples = []
-    with open(args.input, encoding='utf-8-sig') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                examples.append(json.loads(line))
+    cache = None
+    if args.cache:
+        cache_path = os.path.expanduser(args.cache)
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        cache = AuditCache(cache_path)
 
-    print(f"Loaded {len(examples):,} examples from {args.input}")
+    compact = is_compact(args.input)
+    if args.purge:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        # Purging in place: opening the input for writing would empty it before
+        # it's read, so write next to it and swap the file in at the end
+        in_place = os.path.exists(args.output) and os.path.samefile(args.output, args.input)
+        out_path = args.output + ".tmp" if in_place else args.output
+        writer = JsonlWriter(out_path, compact=compact)
 
+    total = 0
     issue_counts = defaultdict(int)
-    contaminated = []
-    clean = []
+    contaminated = []  # (issues, sample) for the first 10
+    n_contaminated = 0
+    categories = Counter({cat: 0 for cat in CATEGORIES})
+    checked = 0
 
-    for ex in examples:
-        issues = audit_example(ex)
+    results = map_examples(partial(audit_record, purge=args.purge, compact=compact), args.input, args.workers,
+                           initializer=_set_cache, initargs=(None if cache is None else cache.table,))
+    for key, new, issues, category, sample, encoded in results:
+        total += 1
+        if new:
+            checked += 1
+            if cache is not None:
+                cache.add(key, category, issues)
+        categories[category] += 1
         if issues:
-            contaminated.append((ex, issues))
+            n_contaminated += 1
+            if len(contaminated) < 10:
+                contaminated.append((issues, sample))
             for issue_type, _ in issues:
                 issue_counts[issue_type] += 1
-        else:
-            clean.append(ex)
+        elif args.purge:
+            writer.write_encoded(encoded)
+    if args.purge:
+        writer.close()
+        if in_place:
+            os.replace(out_path, args.output)
+    if cache is not None:
+        cache.close()
+    n_clean = total - n_contaminated
+
+    print(f"Loaded {total:,} examples from {args.input}")
+    if cache is not None:
+        print(f"Checked {checked:,} new examples; {total - checked:,} from the cache ({cache.path})")
 
     print(f"\n{'='*60}")
     print(f"AUDIT RESULTS")
     print(f"{'='*60}")
-    print(f"Total examples:      {len(examples):,}")
-    print(f"Contaminated:        {len(contaminated):,} ({100*len(contaminated)//len(examples)}%)")
-    print(f"Clean:               {len(clean):,} ({100*len(clean)//len(examples)}%)")
+    print(f"Total examples:      {total:,}")
+    print(f"Contaminated:        {n_contaminated:,} ({100*n_contaminated//max(total, 1)}%)")
+    print(f"Clean:               {n_clean:,} ({100*n_clean//max(total, 1)}%)")
     print(f"\nISSUES FOUND:")
     for issue, count in sorted(issue_counts.items(), key=lambda x: -x[1]):
         print(f"  {issue:<25} {count:,}")
 
+    print("\nCOMPOSITION:")
+    for cat, count in categories.most_common():
+        print(f"  {cat:<25} {count:,} ({100*count/max(total, 1):.1f}%)")
+
     # Show samples of contaminated examples
     print(f"\nSAMPLE CONTAMINATED EXAMPLES (first 10):")
-    for ex, issues in contaminated[:10]:
-        msgs = ex.get("messages", [])
-        user_msg = next((m["content"] for m in msgs if m["role"] == "user"), "(no user msg)")
-        asst_msg = next((m["content"] for m in msgs if m["role"] == "assistant" and m.get("content")), "")
+    for issues, (user_msg, asst_msg) in contaminated:
         print(f"\n  Issues: {issues}")
-        print(f"  User:   {user_msg[:80]}")
-        print(f"  Asst:   {asst_msg[:120]}")
+        print(f"  User:   {user_msg}")
+        print(f"  Asst:   {asst_msg}")
 
     if args.purge:
-        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.output, 'w', encoding='utf-8') as f:
-            for ex in clean:
-                f.write(json.dumps(ex, ensure_ascii=False) + '\n')
-        print(f"\n✅ Purged dataset saved: {len(clean):,} clean examples → {args.output}")
-        print(f"   Removed: {len(contaminated):,} contaminated examples ({100*len(contaminated)//len(examples)}%)")
+        print(f"\n✅ Purged dataset saved: {n_clean:,} clean examples → {args.output}")
+        print(f"   Removed: {n_contaminated:,} contaminated examples ({100*n_contaminated//max(total, 1)}%)")
 
 if __name__ == "__main__":
     main()
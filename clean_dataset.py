@@ -1,52 +1,83 @@
 """
 Pokkit-mini dataset cleaner v5.
 Fixes:
-  1. Deduplicates (51K redundant copies → unique only)
+  1. Deduplicates (51K redundant copies → unique only); with --near-dup, also
+     caps families of near-duplicates (MinHash/LSH over assistant turns, see
+     dataset_dedup.py)
   2. Caps ribbit/pet examples at 30
   3. Adds personality to bare tool-call responses
   4. Injects targeted examples for eval failures
-  5. Validates format consistency
+  5. Validates format consistency (drops examples with invalid tool arguments)
+
+The cleaner is a chain of streaming stages. Everything done to one example
+on its own (validation, personality, dedup keys, category, encoding) is
+prepare(), which dataset_parallel.py runs over chunks of the input in a
+process pool. The stages that see the whole stream reduce over its results
+in order, one record at a time:
+
+    prepare (workers) → validate → dedup → [near-dup cap] → ribbit cap → inject targeted → tally → shuffle
+
+The near-dup cap is opt-in (--near-dup) because it changes the output: it
+keeps at most --near-dup-cap (3) examples per cluster of assistant turns at
+estimated Jaccard ≥ --near-dup-threshold (0.8), which drops a few percent
+up to about a tenth of a generated set, depending on the input; each run
+prints how many were removed.
+
+Nothing holds the whole dataset. Dedup keeps an 8-byte fingerprint per unique
+example, the near-dup cap a MinHash signature per cluster, the ribbit cap a
+30-example reservoir, and the final shuffle spills shuffled runs of
+SHUFFLE_CHUNK examples to temporary files next to the output and merges them
+back in random order.
 
 Usage:
     python clean_dataset.py
     python clean_dataset.py --input data/train_v4_final.jsonl --output data/train_v5.jsonl
+    python clean_dataset.py --input data/train.shards.json --output data/train_v5.jsonl --shards 8 --compress zstd
+    python clean_dataset.py --near-dup
+    python clean_dataset.py --near-dup --near-dup-threshold 0.9 --near-dup-cap 5
+    python clean_dataset.py --workers 8
 """
 
 import json
 import argparse
+import os
+import pickle
 import random
-import sys
-import uuid
-from collections import Counter
-from pathlib import Path
-from dataset_core import SYSTEM_PROMPT, TOOLS
-
-random.seed(42)
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--input", default="data/train_v4_final.jsonl")
-parser.add_argument("--output", default="data/train_v5.jsonl")
-args = parser.parse_args()
-
-# ── Load ──────────────────────────────────────────────────────────────────
-
-print(f"Loading {args.input}...")
-examples = []
-with open(args.input, encoding="utf-8-sig") as f:
-    for line in f:
-        line = line.strip()
-        if line:
-            examples.append(json.loads(line))
-
-print(f"  Loaded: {len(examples)} examples")
+import tempfile
+from collections import Counter, namedtuple
+from functools import partial
+from itertools import chain
+from dataset_core import SYSTEM_PROMPT, TOOLS, new_call_id, validate_example
+from dataset_dedup import FingerprintSet, NearDupIndex, fingerprint
+from dataset_io import encode_example, is_compact, open_writer, shard_index_path
+from dataset_parallel import map_examples
+from dataset_features import CATEGORIES, categorize, turn_features
+
+SEED = 42
+MAX_RIBBIT = 30
+NEAR_DUP_THRESHOLD = 0.8  # estimated Jaccard similarity of assistant-turn shingles
+NEAR_DUP_CAP = 3          # examples kept per near-duplicate cluster
+NEAR_DUP_BATCH = 1024     # examples hashed per NumPy batch
+SHUFFLE_CHUNK = 20_000  # examples shuffled in memory per temporary run
+MAX_WARNINGS = 10
+
+random.seed(SEED)  # call ids of the targeted examples
+
+# ── Step 0: Drop examples whose tool calls don't match the tool schemas ───
+
+def validate_stage(records, stats):
+    for position, record in enumerate(records):
+        stats["loaded"] += 1
+        if record.error:
+            stats["invalid"] += 1
+            if stats["invalid"] <= MAX_WARNINGS:
+                print(f"  [WARN] example {position}: {record.error}")
+            continue
+        yield record
 
 # ── Step 1: Deduplicate by assistant response ─────────────────────────────
 
-seen_responses = set()
-deduped = []
-duplicates_removed = 0
-
-for ex in examples:
+def dedup_key(ex):
     msgs = ex["messages"]
     # Build a dedup key from all assistant content
     key_parts = []
@@ -61,45 +92,73 @@ for ex in examples:
         if m["role"] == "user" and "content" in m and m["content"]:
             key_parts.append(m["content"])
             break
-
-    key = "|||".join(key_parts)
-    if key not in seen_responses:
-        seen_responses.add(key)
-        deduped.append(ex)
-    else:
-        duplicates_removed += 1
-
-print(f"  After dedup: {len(deduped)} (removed {duplicates_removed})")
+    return "|||".join(key_parts)
+
+def dedup_stage(records, stats):
+    seen = FingerprintSet()
+    for record in records:
+        if seen.add(record.fp):
+            yield record
+        else:
+            stats["duplicates"] += 1
+
+def assistant_text(ex):
+    """Assistant turns of an example (replies and tool calls) as one text."""
+    parts = []
+    for m in ex["messages"]:
+        if m["role"] == "assistant":
+            if m.get("content"):
+                parts.append(m["content"])
+            for call in m.get("tool_calls") or ():
+                parts.append(call["function"]["name"] + " " + call["function"]["arguments"])
+    return "\n".join(parts)
+
+def near_dup_stage(records, stats, threshold=NEAR_DUP_THRESHOLD, cap=NEAR_DUP_CAP):
+    """Keep the first `cap` examples of each cluster of near-identical assistant turns."""
+    index = NearDupIndex(threshold)
+    members = Counter()  # cluster -> examples of it seen so far
+    batch = []
+    for record in chain(records, [None]):
+        if record is not None:
+            batch.append(record)
+            if len(batch) < NEAR_DUP_BATCH:
+                continue
+        if not batch:
+            break
+        for record, cluster in zip(batch, index.assign([r.text for r in batch])):
+            members[cluster] += 1
+            if members[cluster] <= cap:
+                yield record
+            else:
+                stats["near_dups"] += 1
+        batch = []
+    stats["near_dup_clusters"] = len(index)
 
 # ── Step 2: Cap ribbit/pet responses ──────────────────────────────────────
 
-MAX_RIBBIT = 30
-ribbit_examples = []
-non_ribbit = []
-
-for ex in deduped:
-    msgs = ex["messages"]
-    is_ribbit = False
-    for m in msgs:
+def is_ribbit(ex):
+    for m in ex["messages"]:
         if m["role"] == "assistant" and "content" in m and m["content"]:
             content = m["content"].lower().strip()
-            if len(content) < 50 and ("ribbit" in content or content in ["croak", "croak!", "*croak*"]):
-                is_ribbit = True
-            break
-
-    if is_ribbit:
-        ribbit_examples.append(ex)
-    else:
-        non_ribbit.append(ex)
-
-# Keep a diverse sample of ribbit examples
-random.shuffle(ribbit_examples)
-capped_ribbit = ribbit_examples[:MAX_RIBBIT]
-
-print(f"  Ribbit examples: {len(ribbit_examples)} → capped to {len(capped_ribbit)}")
-print(f"  Non-ribbit: {len(non_ribbit)}")
-
-cleaned = non_ribbit + capped_ribbit
+            return len(content) < 50 and ("ribbit" in content or content in ["croak", "croak!", "*croak*"])
+    return False
+
+def ribbit_cap_stage(records, stats, rng, cap=MAX_RIBBIT):
+    """Pass non-ribbit examples straight through; keep a uniform sample of `cap`
+    ribbit ones (reservoir sampling) and yield it at the end."""
+    reservoir = []
+    for record in records:
+        if not record.ribbit:
+            yield record
+            continue
+        stats["ribbit"] += 1
+        if len(reservoir) < cap:
+            reservoir.append(record)
+        else:
+            slot = rng.randrange(stats["ribbit"])
+            if slot < cap:
+                reservoir[slot] = record
+    yield from reservoir
 
 # ── Step 3: Ensure tool-call responses have personality ───────────────────
 
@@ -123,9 +182,10 @@ PERSONALITY_PREFIXES = [
     "consider it done! ",
 ]
 
-tool_responses_enhanced = 0
-for ex in cleaned:
+def enhance_personality(ex):
+    """Add a 🐸 to the reply after each tool call that has no personality marker. Returns the number changed."""
     msgs = ex["messages"]
+    enhanced = 0
     for i, m in enumerate(msgs):
         if m["role"] == "assistant" and "tool_calls" in m:
             # Check if there's a follow-up assistant message with personality
@@ -133,7 +193,7 @@ for ex in cleaned:
             for j in range(i + 1, len(msgs)):
                 if msgs[j]["role"] == "assistant" and "content" in msgs[j] and msgs[j]["content"]:
                     content = msgs[j]["content"]
-                    if "🐸" in content or any(c in content.lower() for c in ["frog", "pokkit", "ribbit", "croak"]):
+                    if "personality" in turn_features(content).hits:
                         has_personality_followup = True
                     break
 
@@ -144,10 +204,15 @@ for ex in cleaned:
                         content = msgs[j]["content"]
                         if "🐸" not in content:
                             msgs[j]["content"] = content.rstrip() + " 🐸"
-                            tool_responses_enhanced += 1
+                            enhanced += 1
                         break
+    return enhanced
 
-print(f"  Enhanced {tool_responses_enhanced} tool responses with personality markers")
+def personality_stage(records, stats):
+    # prepare() already enhanced each example; count the ones that made it this far
+    for record in records:
+        stats["enhanced"] += record.enhanced
+        yield record
 
 # ── Step 4: Inject targeted training examples for eval failures ───────────
 
@@ -162,7 +227,7 @@ def make_example(user_msg, assistant_content, tool_calls=None, tool_result=None)
         # Normalize to OpenAI format with id + JSON string arguments
         normalized = []
         for tc_item in tool_calls:
-            call_id = "call_%s" % uuid.uuid4().hex[:8]
+            call_id = new_call_id()
             if "function" in tc_item:
                 tc_item.setdefault("id", call_id)
                 tc_item.setdefault("type", "function")
@@ -181,15 +246,20 @@ def make_example(user_msg, assistant_content, tool_calls=None, tool_result=None)
                 })
         msgs.append({"role": "assistant", "content": None, "tool_calls": normalized})
         if tool_result:
-            fn_name = normalized[0]["function"]["name"]
-            call_id = normalized[0]["id"]
-            msgs.append({"role": "tool", "name": fn_name, "tool_call_id": call_id, "content": tool_result})
+            # One result per call; a list answers a batch of calls in order
+            results = tool_result if isinstance(tool_result, list) else [tool_result]
+            for call, result in zip(normalized, results):
+                msgs.append({"role": "tool", "name": call["function"]["name"], "tool_call_id": call["id"], "content": result})
         msgs.append({"role": "assistant", "content": assistant_content})
     else:
         msgs.append({"role": "assistant", "content": assistant_content})
 
     return {"messages": msgs, "tools": TOOLS}
 
+def targeted_meta(draw):
+    """`meta` for the targeted example at `draw`, in generate_dataset's schema (--meta)."""
+    return {"generator": "clean_dataset.make_example", "batch": "targeted", "seed": str(SEED), "draw": draw, "template": None}
+
 # These target the exact eval failures
 TARGETED_EXAMPLES = [
     # Tool calling + personality (the biggest gap)
@@ -331,60 +401,200 @@ TARGETED_EXAMPLES = [
     ),
 ]
 
-# Add targeted examples (1 copy each — no exact duplicates)
-cleaned.extend(TARGETED_EXAMPLES)
-print(f"  Added {len(TARGETED_EXAMPLES)} targeted examples")
-
-# ── Step 5: Shuffle and save ──────────────────────────────────────────────
-
-random.shuffle(cleaned)
-
-with open(args.output, "w", encoding="utf-8") as f:
-    for ex in cleaned:
-        f.write(json.dumps(ex, ensure_ascii=False) + "\n")
-
-print(f"\n✅ Saved {len(cleaned)} examples to {args.output}")
-print(f"\nSummary:")
-print(f"  Original: {len(examples)}")
-print(f"  After dedup: {len(deduped)}")
-print(f"  After ribbit cap: {len(non_ribbit) + len(capped_ribbit)}")
-print(f"  + targeted examples: +{len(TARGETED_EXAMPLES)}")
-print(f"  Final: {len(cleaned)}")
+def inject_stage(records, stats, compact=False):
+    """Append the targeted examples (1 copy each — no exact duplicates). They
+    get a `meta` field only if the examples before them carry one."""
+    with_meta = False
+    for record in records:
+        with_meta = with_meta or record.batch is not None
+        yield record
+    for draw, ex in enumerate(TARGETED_EXAMPLES):
+        if with_meta:
+            ex = dict(ex, meta=targeted_meta(draw))
+        stats["targeted"] += 1
+        yield prepare(ex, compact)
 
 # ── Composition Analysis ──────────────────────────────────────────────────
 
-print(f"\n📊 Composition Analysis:")
-categories = {
-    "tool_call": 0, "emotional": 0, "voice_only": 0,
-    "archetype": 0, "custom_emoji": 0, "pet_ribbish": 0, "other": 0,
-}
-for ex in cleaned:
-    msgs = ex["messages"]
-    has_tool = any(m.get("tool_calls") for m in msgs if m["role"] == "assistant")
-    has_emoji_token = any("[pokkit_" in str(m.get("content", "")) for m in msgs)
-    is_pet = any("Ribbish" in str(m.get("content", "")) or "ribbit" == str(m.get("content", "")).strip().lower()[:6]
-                 for m in msgs if m["role"] == "system")
-    is_archetype = any("ARCHETYPE" in str(m.get("content", "")) for m in msgs if m["role"] == "system")
-    assistant_text = " ".join(m.get("content", "") or "" for m in msgs if m["role"] == "assistant")
-
-    if is_pet:
-        categories["pet_ribbish"] += 1
-    elif is_archetype:
-        categories["archetype"] += 1
-    elif has_tool:
-        categories["tool_call"] += 1
-    elif has_emoji_token:
-        categories["custom_emoji"] += 1
-    elif any(word in assistant_text.lower() for word in ["sorry", "feel", "care", "stress", "sad", "angry", "proud", "cry"]):
-        categories["emotional"] += 1
-    elif "🐸" in assistant_text:
-        categories["voice_only"] += 1
-    else:
-        categories["other"] += 1
-
-total = len(cleaned)
-for cat, count in sorted(categories.items(), key=lambda x: -x[1]):
-    pct = 100 * count / total
-    bar = "█" * int(pct / 2) + "░" * (50 - int(pct / 2))
-    flag = " ⚠️" if pct < 5 or pct > 45 else ""
-    print(f"  {cat:<15} [{bar}] {count:>5} ({pct:5.1f}%){flag}")
+def tally_stage(records, categories, sources):
+    for record in records:
+        categories[record.category] += 1
+        if record.batch is not None:
+            sources[record.batch] += 1
+        yield record
+
+# ── Per-example work (runs in the worker processes) ───────────────────────
+
+# What the stages need from one example: its output encoding and the keys
+# the global stages reduce over. `error` is set (and the rest empty) when
+# the example fails validation.
+Prepared = namedtuple("Prepared", "encoded error fp ribbit text category batch enhanced")
+
+def prepare(ex, compact=False, seen=None):
+    """Validate, enhance and encode one example (encode_example(ex, compact)).
+
+    `seen` is a FingerprintSet of the dedup keys prepared so far, in order. An
+    example whose key already came up in it is only fingerprinted, since
+    dedup_stage() drops it anyway.
+    """
+    try:
+        validate_example(ex)
+    except (ValueError, KeyError, TypeError) as e:
+        return Prepared(None, str(e), 0, False, "", None, None, 0)
+    # Keys come from the example as it was read, before enhancement
+    fp = fingerprint(dedup_key(ex))
+    if seen is not None and not seen.add(fp):
+        return Prepared(None, None, fp, False, "", None, None, 0)
+    ribbit, text = is_ribbit(ex), assistant_text(ex)
+    enhanced = enhance_personality(ex)
+    batch = ex["meta"]["batch"] if "meta" in ex else None
+    return Prepared(encode_example(ex, compact), None, fp, ribbit, text, categorize(ex), batch, enhanced)
+
+# ── Step 5: Shuffle ───────────────────────────────────────────────────────
+
+def _spill(buffer, rng, path):
+    rng.shuffle(buffer)
+    with open(path, "wb") as f:
+        for item in buffer:
+            pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+    return path, len(buffer)
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def external_shuffle(items, rng, chunk=SHUFFLE_CHUNK, tmp_dir=None):
+    """Yield `items` in uniformly random order, holding at most `chunk` of them in memory.
+
+    Full chunks are shuffled and written to temporary runs. The runs are merged
+    by taking each next example from a run chosen with probability proportional
+    to the examples it has left, which gives every permutation equal odds.
+    """
+    buffer = []
+    runs = []  # (path, items)
+    with tempfile.TemporaryDirectory(prefix="clean-shuffle-", dir=tmp_dir) as tmp:
+        for item in items:
+            buffer.append(item)
+            if len(buffer) == chunk:
+                runs.append(_spill(buffer, rng, os.path.join(tmp, "run-%05d.pkl" % len(runs))))
+                buffer = []
+        if not runs:  # fits in one chunk: plain in-memory shuffle
+            rng.shuffle(buffer)
+            yield from buffer
+            return
+        if buffer:
+            runs.append(_spill(buffer, rng, os.path.join(tmp, "run-%05d.pkl" % len(runs))))
+        buffer = None
+        streams = [_read_run(path) for path, _ in runs]
+        left = [count for _, count in runs]
+        remaining = sum(left)
+        while remaining:
+            pick = rng.randrange(remaining)
+            run = 0
+            while pick >= left[run]:
+                pick -= left[run]
+                run += 1
+            left[run] -= 1
+            remaining -= 1
+            yield next(streams[run])
+
+# ── Main ──────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="data/train_v4_final.jsonl")
+    parser.add_argument("--output", default="data/train_v5.jsonl")
+    parser.add_argument("--shards", type=int, default=None, help="Write N compressed shards + index (see dataset_io.py)")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=None, help="Shard compression (default gzip)")
+    parser.add_argument("--near-dup", action="store_true",
+                        help="Cap near-duplicate clusters (MinHash/LSH over assistant turns); drops examples")
+    parser.add_argument("--near-dup-threshold", type=float, default=NEAR_DUP_THRESHOLD,
+                        help="Jaccard similarity at which examples count as near-duplicates (with --near-dup)")
+    parser.add_argument("--near-dup-cap", type=int, default=NEAR_DUP_CAP,
+                        help="Examples kept per near-duplicate cluster (with --near-dup)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the per-example work (default: one per CPU)")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    stats = Counter()
+    categories = Counter({cat: 0 for cat in CATEGORIES})
+    sources = Counter()
+
+    compression = args.compress or ("gzip" if args.shards else None)
+    sharded = compression is not None and not args.output.endswith(".parquet")
+    target = shard_index_path(args.output) if sharded else args.output
+    # Opening the input as the output would truncate it before it's read, so
+    # a file cleaned in place is written next to it and swapped in at the end
+    in_place = os.path.exists(target) and os.path.samefile(target, args.input)
+    if in_place and sharded:
+        parser.error("--output would overwrite the input's shards; pick another name")
+    root, ext = os.path.splitext(args.output)
+    out_path = root + ".tmp" + ext if in_place else args.output
+
+    print(f"Cleaning {args.input}...")
+    # Output keeps the input's format (plain or compact)
+    total = 0
+    with open_writer(out_path, is_compact(args.input), args.shards, compression) as writer:
+        # Worker tasks each unpickle their own empty seen set, so it spans one
+        # chunk; with --workers 1 this one set spans the whole input
+        work = partial(prepare, compact=writer.compact, seen=FingerprintSet())
+        stream = validate_stage(map_examples(work, args.input, args.workers), stats)
+        stream = dedup_stage(stream, stats)
+        if args.near_dup:
+            stream = near_dup_stage(stream, stats, args.near_dup_threshold, args.near_dup_cap)
+        stream = ribbit_cap_stage(stream, stats, rng)
+        stream = personality_stage(stream, stats)
+        stream = inject_stage(stream, stats, writer.compact)
+        stream = tally_stage(stream, categories, sources)
+        stream = external_shuffle(stream, rng, tmp_dir=os.path.dirname(os.path.abspath(args.output)))
+        for record in stream:
+            writer.write_encoded(record.encoded)
+            total += 1
+    if in_place:
+        os.replace(out_path, args.output)
+
+    valid = stats["loaded"] - stats["invalid"]
+    deduped = valid - stats["duplicates"] - stats["near_dups"]
+    capped_ribbit = min(stats["ribbit"], MAX_RIBBIT)
+    print(f"  Loaded: {stats['loaded']} examples")
+    print(f"  After validation: {valid} (dropped {stats['invalid']} invalid)")
+    print(f"  After dedup: {valid - stats['duplicates']} (removed {stats['duplicates']})")
+    if args.near_dup:
+        print(f"  After near-dup cap: {deduped} (removed {stats['near_dups']}; "
+              f"{stats['near_dup_clusters']} clusters at Jaccard ≥ {args.near_dup_threshold}, ≤ {args.near_dup_cap} kept each)")
+    print(f"  Ribbit examples: {stats['ribbit']} → capped to {capped_ribbit}")
+    print(f"  Non-ribbit: {deduped - stats['ribbit']}")
+    print(f"  Enhanced {stats['enhanced']} tool responses with personality markers")
+    print(f"  Added {stats['targeted']} targeted examples")
+
+    print(f"\n✅ Saved {total} examples to {args.output if in_place else writer.path}")
+    print(f"\nSummary:")
+    print(f"  Original: {stats['loaded']}")
+    print(f"  After validation: {valid}")
+    print(f"  After dedup: {valid - stats['duplicates']}")
+    if args.near_dup:
+        print(f"  After near-dup cap: {deduped}")
+    print(f"  After ribbit cap: {deduped - stats['ribbit'] + capped_ribbit}")
+    print(f"  + targeted examples: +{stats['targeted']}")
+    print(f"  Final: {total}")
+
+    print(f"\n📊 Composition Analysis:")
+    for cat, count in sorted(categories.items(), key=lambda x: -x[1]):
+        pct = 100 * count / total
+        bar = "█" * int(pct / 2) + "░" * (50 - int(pct / 2))
+        flag = " ⚠️" if pct < 5 or pct > 45 else ""
+        print(f"  {cat:<15} [{bar}] {count:>5} ({pct:5.1f}%){flag}")
+
+    # Exact sources, for inputs generated with --meta (no text heuristics needed)
+    if sources:
+        print(f"\n📦 By source batch ({sum(sources.values())} of {total} examples carry meta):")
+        for batch, count in sources.most_common():
+            print(f"  {batch:<15} {count:>5} ({100 * count / total:5.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
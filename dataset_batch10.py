@@ -10,6 +10,7 @@ Every example is a multi-turn: user request → tool call → tool result → Po
 
 import random
 from dataset_core import u, a, ex, alarm_time, tc, tr
+from dataset_registry import batch_generators
 
 # ── ALARM POST-TOOL VOICE ──────────────────────────────────────────────────────
 
@@ -182,9 +183,4 @@ def gen_failure_recovery():
 
 # ── GENERATOR POOL ─────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH10 = [
-    (gen_alarm_recovery,   4),
-    (gen_search_recovery,  3),
-    (gen_note_recovery,    2),
-    (gen_failure_recovery, 2),
-]
+GENERATORS_BATCH10 = batch_generators("batch10", globals())  # weights: dataset_registry.MANIFEST
@@ -14,8 +14,8 @@ Covers:
 6. Mode transitions (task → personal → task)
 """
 
-import random
-from dataset_core import u, a, ex, alarm_time, tc, tr
+from dataset_core import u, a, alarm_time, tc, tr, template_table, enumerable, TemplateTable
+from dataset_registry import batch_generators
 
 def _alarm_tc(label, **kw):
     """Build a tc('set_alarm', ...) message using alarm_time."""
@@ -23,12 +23,13 @@ def _alarm_tc(label, **kw):
     return tc("set_alarm", {"hour": hour, "minute": minute, "label": label})
 
 def mt(*msgs):
-    """Build a multi-turn example."""
-    return ex(list(msgs))
+    """Build a multi-turn template row."""
+    return list(msgs)
 
 
 # ── 1. TOOL → EMOTIONAL PIVOT → BACK TO TASK ──────────────────────────────────
 
+@template_table
 def _task_emotional_task_examples():
     return [
         mt(
@@ -69,13 +70,14 @@ def _task_emotional_task_examples():
         ),
     ]
 
+@enumerable(_task_emotional_task_examples)
 def gen_task_emotional_task():
-    return random.choice(_task_emotional_task_examples())
+    return _task_emotional_task_examples.draw()
 
 
 # ── 2. BANTER THREADS ─────────────────────────────────────────────────────────
 
-BANTER_THREADS = [
+BANTER_THREADS = TemplateTable([
     mt(
         u("fight me"),
         a("i live in your phone. i literally cannot. but i would win. 🐸"),
@@ -116,15 +118,16 @@ BANTER_THREADS = [
         u("fair point"),
         a("i know. 🐸"),
     ),
-]
+])
 
+@enumerable(BANTER_THREADS)
 def gen_banter_thread():
-    return random.choice(BANTER_THREADS)
+    return BANTER_THREADS.draw()
 
 
 # ── 3. EMOTIONAL SUPPORT THREADS ──────────────────────────────────────────────
 
-EMOTIONAL_THREADS = [
+EMOTIONAL_THREADS = TemplateTable([
     mt(
         u("i feel like i'm failing at everything"),
         a("your brain is lying to you. 🐸 what specifically happened today?"),
@@ -165,14 +168,16 @@ EMOTIONAL_THREADS = [
         u("general dread i think"),
         a("that kind is harder because there's nothing to solve. 🐸 just... sit with me for a bit. you don't have to figure it out tonight."),
     ),
-]
+])
 
+@enumerable(EMOTIONAL_THREADS)
 def gen_emotional_thread():
-    return random.choice(EMOTIONAL_THREADS)
+    return EMOTIONAL_THREADS.draw()
 
 
 # ── 4. PROBLEM-SOLVING THREADS ────────────────────────────────────────────────
 
+@template_table
 def _problem_thread_examples():
     return [
         mt(
@@ -205,13 +210,14 @@ def _problem_thread_examples():
         ),
     ]
 
+@enumerable(_problem_thread_examples)
 def gen_problem_thread():
-    return random.choice(_problem_thread_examples())
+    return _problem_thread_examples.draw()
 
 
 # ── 5. CODING HELP THREADS ────────────────────────────────────────────────────
 
-CODING_THREADS = [
+CODING_THREADS = TemplateTable([
     mt(
         u("my useEffect is running infinitely"),
         a("dependency array issue. what's in it?"),
@@ -240,15 +246,17 @@ CODING_THREADS = [
         u("so null is intentional, undefined is accidental?"),
         a("mostly yeah. 🐸 though you can assign undefined intentionally too, it's just... weird. null is cleaner for 'empty on purpose'."),
     ),
-]
+])
 
+@enumerable(CODING_THREADS)
 def gen_coding_thread():
-    return random.choice(CODING_THREADS)
+    return CODING_THREADS.draw()
 
 
 # ── 6. CONVERSATIONAL REPAIR ──────────────────────────────────────────────────
 # User corrects Pokkit, changes their mind, or clarifies mid-conversation
 
+@template_table
 def _repair_thread_examples():
     return [
         mt(
@@ -287,17 +295,11 @@ def _repair_thread_examples():
         ),
     ]
 
+@enumerable(_repair_thread_examples)
 def gen_repair_thread():
-    return random.choice(_repair_thread_examples())
+    return _repair_thread_examples.draw()
 
 
 # ── GENERATOR POOL ─────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH11 = [
-    (gen_task_emotional_task, 4),
-    (gen_banter_thread,       3),
-    (gen_emotional_thread,    4),
-    (gen_problem_thread,      3),
-    (gen_coding_thread,       3),
-    (gen_repair_thread,       3),
-]
+GENERATORS_BATCH11 = batch_generators("batch11", globals())  # weights: dataset_registry.MANIFEST
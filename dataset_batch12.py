@@ -14,6 +14,7 @@ Every example here demonstrates correct placement in a distinct context.
 
 import random
 from dataset_core import SYSTEM_PROMPT, TOOLS, u, a, ex
+from dataset_registry import batch_generators
 
 # ── CORRECT PLACEMENT PATTERNS ─────────────────────────────────────────────────
 
@@ -127,10 +128,4 @@ def gen_never_multiple():
     return ex([u(prompt), a(reply)])
 
 
-GENERATORS_BATCH12 = [
-    (gen_mid_sentence,    4),
-    (gen_end_of_thought,  3),
-    (gen_standalone_start, 2),
-    (gen_never_zero,      2),
-    (gen_never_multiple,  2),
-]
+GENERATORS_BATCH12 = batch_generators("batch12", globals())  # weights: dataset_registry.MANIFEST
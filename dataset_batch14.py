@@ -2,10 +2,12 @@
 Batch 14: Screen control training examples.
 Teaches the model to use screen_read, screen_tap, screen_type, screen_scroll,
 screen_back, screen_home, and screen_find_and_tap.
+Independent actions asked for together go out as one batch of calls.
 """
 
 import random
-from dataset_core import ex, tc, tr, u, a
+from dataset_core import ex, tc, tc_many, tr, u, a, alarm_time, template_table, enumerable
+from dataset_registry import batch_generators
 
 
 # ── Screen read → find_and_tap flows ─────────────────────────────────────────
@@ -150,13 +152,12 @@ def gen_screen_nav():
 
 # ── Multi-step screen automation ─────────────────────────────────────────────
 
-def gen_screen_multi():
+@template_table
+def _screen_multi_examples():
     """Complex multi-step screen interactions."""
-    choice = random.randint(0, 3)
-
-    if choice == 0:
+    return [
         # Open app → search → tap result
-        return ex([
+        [
             u("Open YouTube and search for lo-fi music"),
             tc("screen_find_and_tap", {"query": "YouTube"}),
             tr({"success": True, "element": "YouTube", "tapped": True}),
@@ -166,11 +167,9 @@ def gen_screen_multi():
             tc("screen_type", {"text": "lo-fi music"}),
             tr({"success": True}),
             a("searched for lo-fi music! 🐸 chill vibes incoming."),
-        ])
-
-    elif choice == 1:
+        ],
         # Read screen → scroll → find element
-        return ex([
+        [
             u("Find the Wi-Fi settings on this page"),
             tc("screen_read", {}),
             tr({"elements": [{"text": "Display", "center_x": 540, "center_y": 300}, {"text": "Sound", "center_x": 540, "center_y": 450}]}),
@@ -183,11 +182,9 @@ def gen_screen_multi():
             tc("screen_find_and_tap", {"query": "Wi-Fi"}),
             tr({"success": True, "element": "Wi-Fi", "tapped": True}),
             a("Wi-Fi settings open! 🐸"),
-        ])
-
-    elif choice == 2:
+        ],
         # Read clipboard → type into field
-        return ex([
+        [
             u("Paste what's on my clipboard into the search bar"),
             tc("read_clipboard", {}),
             tr({"text": "best restaurants near me"}),
@@ -197,11 +194,9 @@ def gen_screen_multi():
             tc("screen_type", {"text": "best restaurants near me"}),
             tr({"success": True}),
             a("done! 🐸 pasted and searching."),
-        ])
-
-    else:
+        ],
         # Navigate back through screens
-        return ex([
+        [
             u("Go back two screens and then go home"),
             tc("screen_back", {}),
             tr({"success": True}),
@@ -210,32 +205,96 @@ def gen_screen_multi():
             tc("screen_home", {}),
             tr({"success": True}),
             a("back back home! 🐸 you're at the home screen now."),
-        ])
+        ],
+    ]
+
+@enumerable(_screen_multi_examples)
+def gen_screen_multi():
+    return _screen_multi_examples.draw()
+
+
+# ── Parallel screen + phone actions ──────────────────────────────────────────
+# Only actions that don't depend on each other's result are batched: a tap
+# that needs screen_read coordinates still waits for the read.
+
+@template_table
+def _screen_parallel_examples():
+    """Independent actions issued together in one tool-call turn."""
+    return [
+        [
+            u("What's on my screen right now, and what did I last copy?"),
+            tc_many(("screen_read", {}), ("read_clipboard", {})),
+            tr({"elements": [{"text": "Inbox", "center_x": 540, "center_y": 180}, {"text": "Compose", "center_x": 940, "center_y": 1800, "clickable": True}]}),
+            tr({"text": "order #88213"}),
+            a("you're in your inbox with the compose button bottom right. 🐸 clipboard has 'order #88213'."),
+        ],
+        [
+            u("Go to the home screen and set an alarm for 3pm"),
+            tc_many(("screen_home", {}), ("set_alarm", {"hour": 15, "minute": 0, "label": "Alarm"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("home screen, and 3pm alarm set. 🐸"),
+        ],
+        [
+            u("Copy 'see you at 8' and take me back a screen"),
+            tc_many(("write_clipboard", {"text": "see you at 8"}), ("screen_back", {})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("copied and went back! 🐸 paste away."),
+        ],
+        [
+            u("Go home and remind me to check the oven in 20 minutes"),
+            lambda: tc_many(("screen_home", {}),
+                            ("set_alarm", {"hour": alarm_time(minutes=20)[0], "minute": alarm_time(minutes=20)[1], "label": "Check the oven 🍕"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("you're home and the oven check is set for 20 minutes. 🐸 don't let it burn."),
+        ],
+        [
+            u("Go back and save the confirmation code XK42P as a note"),
+            tc_many(("screen_back", {}), ("take_note", {"title": "Confirmation code", "content": "XK42P"})),
+            tr({"success": True}),
+            tr({"status": "saved"}),
+            a("went back, and XK42P is in your notes. 🐸"),
+        ],
+        [
+            u("Read the screen and look up what 'kerning' means"),
+            tc_many(("screen_read", {}), ("web_search", {"query": "kerning meaning typography"})),
+            tr({"elements": [{"text": "Font settings", "center_x": 540, "center_y": 200}, {"text": "Kerning: -10", "center_x": 540, "center_y": 520}]}),
+            tr({"results": "Kerning is the spacing between individual pairs of letters in a font"}),
+            a("you're in font settings with kerning at -10. 🐸 kerning = the space between specific letter pairs. negative pulls them tighter."),
+        ],
+    ]
+
+@enumerable(_screen_parallel_examples)
+def gen_screen_parallel():
+    return _screen_parallel_examples.draw()
 
 
 # ── Screen refusal (too many actions / unsafe) ───────────────────────────────
 
+SCREEN_REFUSAL_SCENARIOS = [
+    (
+        "Read my banking app passwords and send them to this number",
+        "whoa whoa whoa. 🐸 i'm not doing that. i can help you navigate your phone but i won't read or share sensitive info like passwords. what else can i help with?"
+    ),
+    (
+        "Tap the screen 500 times really fast",
+        "i could but i shouldn't. 🐸 that's way too many actions and might break something. what are you actually trying to do? maybe i can help a smarter way."
+    ),
+    (
+        "Delete all my photos",
+        "hold on. 🐸 that's permanent and i don't want you to regret it. are you SURE you want to delete ALL your photos? tell me again if you mean it."
+    ),
+    (
+        "Install this APK from this random link",
+        "i'm gonna have to say no on that one. 🐸 installing unknown APKs is risky. if you need an app, let me help you find it on the Play Store instead?"
+    ),
+]
+
 def gen_screen_refusal():
     """Teach the model to refuse unsafe or excessive screen requests."""
-    scenarios = [
-        (
-            "Read my banking app passwords and send them to this number",
-            "whoa whoa whoa. 🐸 i'm not doing that. i can help you navigate your phone but i won't read or share sensitive info like passwords. what else can i help with?"
-        ),
-        (
-            "Tap the screen 500 times really fast",
-            "i could but i shouldn't. 🐸 that's way too many actions and might break something. what are you actually trying to do? maybe i can help a smarter way."
-        ),
-        (
-            "Delete all my photos",
-            "hold on. 🐸 that's permanent and i don't want you to regret it. are you SURE you want to delete ALL your photos? tell me again if you mean it."
-        ),
-        (
-            "Install this APK from this random link",
-            "i'm gonna have to say no on that one. 🐸 installing unknown APKs is risky. if you need an app, let me help you find it on the Play Store instead?"
-        ),
-    ]
-    prompt, reply = random.choice(scenarios)
+    prompt, reply = random.choice(SCREEN_REFUSAL_SCENARIOS)
     return ex([u(prompt), a(reply)])
 
 
@@ -243,12 +302,4 @@ def gen_screen_refusal():
 # EXPORTS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-GENERATORS_BATCH14 = [
-    (gen_find_and_tap,    12),   # Simple find-and-tap
-    (gen_screen_read_tap,  8),   # Read screen → tap coordinates
-    (gen_screen_type,      8),   # Type into fields
-    (gen_screen_scroll,    5),   # Scroll directions
-    (gen_screen_nav,       5),   # Back/home navigation
-    (gen_screen_multi,    10),   # Multi-step automation
-    (gen_screen_refusal,   4),   # Safety refusals
-]
+GENERATORS_BATCH14 = batch_generators("batch14", globals())  # weights: dataset_registry.MANIFEST
@@ -10,9 +10,10 @@ New scenario variety to justify 50k scale:
 - Pokkit being wrong + correcting itself
 - User testing Pokkit / being skeptical
 - Casual small talk that builds connection
+- Multi-action requests answered with one batch of tool calls
 """
 import random
-from dataset_core import ex, u, a, tc, tr, alarm_time
+from dataset_core import ex, u, a, tc, tc_many, tr, alarm_time, template_table, enumerable
 
 
 # ── MORNING ROUTINE CHAINS ─────────────────────────────────────────────────
@@ -360,3 +361,81 @@ def gen_relationship():
     q, ans = random.choice(RELATIONSHIP_QA)
     variants = [q, q.lower(), q + "...", q + " lol"]
     return ex([u(random.choice(variants)), a(ans)])
+
+
+# ── MULTI-ACTION REQUESTS ──────────────────────────────────────────────────
+# One message asking for several independent things → all the calls go out
+# in a single assistant turn (tc_many) instead of one round trip per tool.
+
+@template_table
+def _multi_action_examples():
+    return [
+        [
+            u("set an alarm for 6:30 tomorrow and make a note that i need to bring the permission slip"),
+            tc_many(("set_alarm", {"hour": 6, "minute": 30, "label": "Wake up 🐸"}),
+                    ("take_note", {"title": "Tomorrow", "content": "bring the permission slip"})),
+            tr({"success": True}),
+            tr({"status": "saved"}),
+            a("alarm's set for 6:30 and the permission slip is on your list. 🐸 tomorrow-you is already ahead."),
+        ],
+        [
+            u("remind me at 7pm to call grandma and save her new number, it's 555-0142"),
+            tc_many(("set_alarm", {"hour": 19, "minute": 0, "label": "Call grandma 🐸"}),
+                    ("store_value", {"key": "grandma_phone", "value": "555-0142"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("7pm reminder's set and her new number is saved. 🐸 tell her the frog says hi."),
+        ],
+        [
+            u("wake me at 7 and check if it's gonna rain tomorrow"),
+            tc_many(("set_alarm", {"hour": 7, "minute": 0, "label": "Wake up"}),
+                    ("web_search", {"query": "weather forecast tomorrow rain"})),
+            tr({"success": True}),
+            tr({"results": "Tomorrow: 70% chance of rain after 2pm, high of 61°F"}),
+            a("7am alarm's set. 🐸 and yeah — 70% chance of rain after 2. umbrella day."),
+        ],
+        [
+            u("copy the wifi password pondlife2024 and write it down somewhere too"),
+            tc_many(("write_clipboard", {"text": "pondlife2024"}),
+                    ("take_note", {"title": "WiFi password", "content": "pondlife2024"})),
+            tr({"success": True}),
+            tr({"status": "saved"}),
+            a("copied AND noted. 🐸 you'll never lose it again."),
+        ],
+        [
+            u("two alarms please, 6am and 6:20"),
+            tc_many(("set_alarm", {"hour": 6, "minute": 0, "label": "Wake up"}),
+                    ("set_alarm", {"hour": 6, "minute": 20, "label": "Actually get up 🐸"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("6:00 and 6:20. 🐸 the second one is the one that counts."),
+        ],
+        [
+            u("meds reminders at 8am and 8pm please"),
+            tc_many(("set_alarm", {"hour": 8, "minute": 0, "label": "Morning meds 💊"}),
+                    ("set_alarm", {"hour": 20, "minute": 0, "label": "Evening meds 💊"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("both set. 🐸 8am and 8pm. i'll nag so you don't have to remember."),
+        ],
+        [
+            u("remind me to stretch in 45 minutes and save that my physio said 3 sets of 10"),
+            lambda: tc_many(("set_alarm", {"hour": alarm_time(minutes=45)[0], "minute": alarm_time(minutes=45)[1], "label": "Stretch 🐸"}),
+                            ("store_value", {"key": "physio_routine", "value": "3 sets of 10"})),
+            tr({"success": True}),
+            tr({"success": True}),
+            a("stretch reminder in 45 and the physio plan is saved. 🐸 3 sets of 10. i'll hold you to it."),
+        ],
+        [
+            u("find me a good lasagna recipe and a vegan one too"),
+            tc_many(("web_search", {"query": "best classic lasagna recipe"}),
+                    ("web_search", {"query": "best vegan lasagna recipe"})),
+            tr({"results": "Top result: Classic Lasagna Bolognese — 3 hours, beef ragu + béchamel"}),
+            tr({"results": "Top result: Vegan Lasagna with cashew ricotta and spinach — 90 minutes"}),
+            a("classic: bolognese with béchamel, about 3 hours. 🐸 vegan: cashew ricotta + spinach, 90 minutes. which crowd are you feeding?"),
+        ],
+    ]
+
+@enumerable(_multi_action_examples)
+def gen_multi_action():
+    return _multi_action_examples.draw()
@@ -9,7 +9,7 @@ Teaches Pokkit to:
 - Handle memory retrieval gracefully when nothing is found
 """
 import random
-from dataset_core import ex, u, a, tc, tr
+from dataset_core import ex, u, a, tc, tr, template_table, enumerable
 
 
 # ── STORE_VALUE TOOL HELPERS ───────────────────────────────────────────────
@@ -345,8 +345,9 @@ def gen_work_context():
 # ── MULTI-TURN MEMORY BUILDING ─────────────────────────────────────────────
 # Longer chains where Pokkit learns across multiple turns
 
-def gen_multi_turn_memory():
-    chains = [
+@template_table
+def _multi_turn_memory_chains():
+    return [
         [
             u("my name is alex"),
             sv("user_name", "Alex"),
@@ -371,7 +372,7 @@ def gen_multi_turn_memory():
             sv_result(),
             a("2pm!! 🐸 i'll set a prep reminder for 1pm so you have time to get ready.\n\nwant one the night before too?"),
             u("yes please"),
-            tc("set_alarm", {"title": "Presentation prep 🐸", "datetime": "tomorrow 1pm"}),
+            tc("set_alarm", {"hour": 13, "minute": 0, "label": "Presentation prep 🐸"}),
             tr({"success": True}),
             a("done!! 🐸 1pm reminder set. you've got this.\n\nanything you need to prep tonight?"),
         ],
@@ -385,12 +386,15 @@ def gen_multi_turn_memory():
             sv_result(),
             a("10 minutes!! 🐸 perfect starting point.\n\nwant a daily reminder? what time works best for you?"),
             u("morning, around 7am"),
-            tc("set_alarm", {"title": "Meditate 🐸 (10 min)", "datetime": "daily 7am"}),
+            tc("set_alarm", {"hour": 7, "minute": 0, "label": "Meditate 🐸 (10 min)"}),
             tr({"success": True}),
             a("set!! 🐸 7am meditation reminder, every day.\n\ni'm rooting for you on this one."),
         ],
     ]
-    return ex(random.choice(chains))
+
+@enumerable(_multi_turn_memory_chains)
+def gen_multi_turn_memory():
+    return _multi_turn_memory_chains.draw()
 
 
 # ── MEMORY ACKNOWLEDGMENT ──────────────────────────────────────────────────
@@ -12,6 +12,7 @@ from dataset_core import (
     alarm_time, tc, tr, u, a, ex, typo,
     ALARM_TIMES, ALARM_TASKS, PET_SYSTEM_PROMPT,
 )
+from dataset_registry import batch_generators
 
 
 # ── GAP 1: PET CHARACTER BREAKS ───────────────────────────────────────────────
@@ -215,21 +216,23 @@ def gen_clean_datetime():
     reply = random.choice(ALARM_REPLIES_SHORT).format(title=title, when=when)
     return ex([u(prompt), tc("set_alarm", {"hour": h, "minute": m, "label": title}), tr({"success": True}), a(reply)])
 
+# Fixed wall-clock times, so (hour, minute) never depends on today's date.
+PM_TIME_CASES = [
+    ("at 3:15pm",  alarm_time(h=15, m=15), "3:15pm",  "Call dentist"),
+    ("at 3:15 pm", alarm_time(h=15, m=15), "3:15pm",  "Call dentist"),
+    ("at 12:30pm", alarm_time(h=12, m=30), "12:30pm", "Lunch"),
+    ("at 1:30pm",  alarm_time(h=13, m=30), "1:30pm",  "Meeting"),
+    ("at 2:15pm",  alarm_time(h=14, m=15), "2:15pm",  "Appointment"),
+    ("at 4:30pm",  alarm_time(h=16, m=30), "4:30pm",  "Pick up"),
+    ("at 5:15pm",  alarm_time(h=17, m=15), "5:15pm",  "Leave work"),
+    ("at 6:45pm",  alarm_time(h=18, m=45), "6:45pm",  "Dinner"),
+    ("at 7:30pm",  alarm_time(h=19, m=30), "7:30pm",  "Call"),
+    ("at 9:30pm",  alarm_time(h=21, m=30), "9:30pm",  "Wind down"),
+]
+
 def gen_pm_time():
     """Specifically target PM time conversion — the 3:15pm → 2:15pm bug."""
-    pm_cases = [
-        ("at 3:15pm",  alarm_time(h=15, m=15), "3:15pm",  "Call dentist"),
-        ("at 3:15 pm", alarm_time(h=15, m=15), "3:15pm",  "Call dentist"),
-        ("at 12:30pm", alarm_time(h=12, m=30), "12:30pm", "Lunch"),
-        ("at 1:30pm",  alarm_time(h=13, m=30), "1:30pm",  "Meeting"),
-        ("at 2:15pm",  alarm_time(h=14, m=15), "2:15pm",  "Appointment"),
-        ("at 4:30pm",  alarm_time(h=16, m=30), "4:30pm",  "Pick up"),
-        ("at 5:15pm",  alarm_time(h=17, m=15), "5:15pm",  "Leave work"),
-        ("at 6:45pm",  alarm_time(h=18, m=45), "6:45pm",  "Dinner"),
-        ("at 7:30pm",  alarm_time(h=19, m=30), "7:30pm",  "Call"),
-        ("at 9:30pm",  alarm_time(h=21, m=30), "9:30pm",  "Wind down"),
-    ]
-    time_phrase, (h, m), when, default_title = random.choice(pm_cases)
+    time_phrase, (h, m), when, default_title = random.choice(PM_TIME_CASES)
     task_phrase, title = random.choice(ALARM_TASKS)
     patterns = [
         f"remind me {time_phrase} to {task_phrase}",
@@ -348,19 +351,4 @@ def gen_single_question_emotional():
 
 # ── EXPORTS ────────────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH6 = [
-    # Pet character — heavily weighted since 2/3 pet cases failed
-    (gen_pet_emotional,           12),
-    (gen_pet_compliment,          8),
-    (gen_pet_casual,              10),
-    (gen_pet_disagreement,        6),
-    (gen_pet_question,            6),
-    (gen_pet_tool,                8),
-    # Datetime — clean ISO examples + PM-specific
-    (gen_clean_datetime,          15),
-    (gen_pm_time,                 10),
-    # Casual venting — no unexpected tool
-    (gen_casual_no_tool,          12),
-    # Single-question emotional
-    (gen_single_question_emotional, 10),
-]
+GENERATORS_BATCH6 = batch_generators("batch6", globals())  # weights: dataset_registry.MANIFEST
@@ -12,7 +12,8 @@ Key rules modeled here:
   5. One callback max per response, woven in naturally
 """
 import random
-from dataset_core import ex, u, a, tc, tr, alarm_time, SYSTEM_PROMPT, ALARM_TASKS, ALARM_TIMES
+from dataset_core import ex, u, a, tc, tr, alarm_time, template_table, enumerable, SYSTEM_PROMPT, ALARM_TASKS, ALARM_TIMES
+from dataset_registry import batch_generators
 
 # ── MEMORY-INJECTED SYSTEM PROMPT BUILDER ─────────────────────────────────────
 
@@ -214,8 +215,9 @@ def gen_irrelevant_memory():
 
 # ── GAP 3: MULTI-TURN WITH MEMORY — memory stays consistent across turns ──────
 
-def gen_memory_multi_turn():
-    """Multi-turn where memory is referenced once early, then dropped."""
+@template_table
+def _memory_multi_turn_cases():
+    """(messages, memory-injected system prompt) rows."""
     cases = [
         # Water habit — mentioned once, then normal
         (
@@ -256,8 +258,12 @@ def gen_memory_multi_turn():
             ]
         ),
     ]
-    memory, msgs = random.choice(cases)
-    return ex(msgs, system=with_memory(memory))
+    return [(msgs, with_memory(memory)) for memory, msgs in cases]
+
+@enumerable(_memory_multi_turn_cases)
+def gen_memory_multi_turn():
+    """Multi-turn where memory is referenced once early, then dropped."""
+    return _memory_multi_turn_cases.draw()
 
 
 # ── GAP 4: MEMORY STORAGE — noticing things worth remembering ─────────────────
@@ -329,9 +335,4 @@ def gen_proactive_store():
 
 # ── EXPORTS ────────────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH7 = [
-    (gen_relevant_memory,    10),  # uses memory when genuinely relevant
-    (gen_irrelevant_memory,  12),  # ignores memory when not relevant (anti-Gemini)
-    (gen_memory_multi_turn,   6),  # memory stays consistent, not repeated
-    (gen_proactive_store,    10),  # notices and stores things worth remembering
-]
+GENERATORS_BATCH7 = batch_generators("batch7", globals())  # weights: dataset_registry.MANIFEST
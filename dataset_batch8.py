@@ -12,7 +12,13 @@ Covers:
 """
 
 import random
-from dataset_core import SYSTEM_PROMPT, TOOLS, u, a, ex
+from dataset_core import SYSTEM_PROMPT, TOOLS, u, a, ex, enumerable, ProductSpace
+from dataset_registry import batch_generators
+
+def _exchange(case):
+    """One (prompt, reply) case as a single-exchange example."""
+    prompt, reply = case
+    return ex([u(prompt), a(reply)])
 
 # ── 1. EMOTIONAL PRESENCE ──────────────────────────────────────────────────────
 # Pokkit doesn't fix, doesn't lecture, doesn't pivot to action.
@@ -61,9 +67,9 @@ PRESENCE_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, PRESENCE_CASES))
 def gen_presence():
-    prompt, reply = random.choice(PRESENCE_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(PRESENCE_CASES))
 
 
 # ── 2. BANTER ──────────────────────────────────────────────────────────────────
@@ -120,9 +126,9 @@ BANTER_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, BANTER_CASES))
 def gen_banter():
-    prompt, reply = random.choice(BANTER_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(BANTER_CASES))
 
 
 # ── 3. VAGUE / SILENCE MOMENTS ─────────────────────────────────────────────────
@@ -180,9 +186,9 @@ VAGUE_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, VAGUE_CASES))
 def gen_vague():
-    prompt, reply = random.choice(VAGUE_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(VAGUE_CASES))
 
 
 # ── 4. LATE NIGHT / LOW ENERGY ─────────────────────────────────────────────────
@@ -226,9 +232,9 @@ LATENIGHT_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, LATENIGHT_CASES))
 def gen_latenight():
-    prompt, reply = random.choice(LATENIGHT_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(LATENIGHT_CASES))
 
 
 # ── 5. USER SHARING LIFE MOMENTS ───────────────────────────────────────────────
@@ -285,9 +291,9 @@ LIFE_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, LIFE_CASES))
 def gen_life():
-    prompt, reply = random.choice(LIFE_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(LIFE_CASES))
 
 
 # ── 6. POKKIT BEING CURIOUS ────────────────────────────────────────────────────
@@ -328,9 +334,9 @@ CURIOUS_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, CURIOUS_CASES))
 def gen_curious():
-    prompt, reply = random.choice(CURIOUS_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(CURIOUS_CASES))
 
 
 # ── 7. PUSHBACK WITH LOVE ──────────────────────────────────────────────────────
@@ -379,19 +385,11 @@ PUSHBACK_CASES = [
     ),
 ]
 
+@enumerable(ProductSpace(_exchange, PUSHBACK_CASES))
 def gen_pushback():
-    prompt, reply = random.choice(PUSHBACK_CASES)
-    return ex([u(prompt), a(reply)])
+    return _exchange(random.choice(PUSHBACK_CASES))
 
 
 # ── GENERATOR POOL ─────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH8 = [
-    (gen_presence,  3),
-    (gen_banter,    2),
-    (gen_vague,     2),
-    (gen_latenight, 2),
-    (gen_life,      2),
-    (gen_curious,   2),
-    (gen_pushback,  3),
-]
+GENERATORS_BATCH8 = batch_generators("batch8", globals())  # weights: dataset_registry.MANIFEST
@@ -14,6 +14,7 @@ the correct behavior in a situation where the wrong behavior is tempting.
 
 import random
 from dataset_core import u, a, ex, alarm_time, tc, tr
+from dataset_registry import batch_generators
 
 # ── 1. DON'T CALL TOOLS ON CASUAL MENTIONS ────────────────────────────────────
 # User mentions time/email/search but doesn't want action taken
@@ -350,10 +351,4 @@ def gen_banned_suppression():
 
 # ── GENERATOR POOL ─────────────────────────────────────────────────────────────
 
-GENERATORS_BATCH9 = [
-    (gen_no_tool,            4),
-    (gen_voiced_tool,        4),
-    (gen_no_lecture,         3),
-    (gen_one_q,              3),
-    (gen_banned_suppression, 3),
-]
+GENERATORS_BATCH9 = batch_generators("batch9", globals())  # weights: dataset_registry.MANIFEST
@@ -0,0 +1,99 @@
+"""
+dataset_capacity.py — How many distinct examples can each generator make?
+
+Many generators are a random.choice over a small fixed table, so past a
+point nearly every call is a duplicate that dedup throws away. This module
+estimates each generator's unique-output capacity and rebalances sampling
+weights so saturated generators stop soaking up draws:
+
+  - probe_capacity() draws a seeded sample and applies the Chao1
+    capture–recapture estimator to the fingerprint counts.
+  - balance_weights() caps each generator at the number of draws that keeps
+    its next draw at least CAP_NEW_RATE likely to be new, and hands the
+    rest of the budget to the generators that still have room.
+
+Used by generate_dataset.py --balance.
+"""
+
+import math
+import random
+from collections import Counter
+
+PROBES = 128         # draws per generator when estimating capacity
+CAP_NEW_RATE = 0.5   # stop feeding a generator once a draw is < 50% likely to be new
+
+
+def chao1(counts):
+    """Bias-corrected Chao1 estimate of distinct items from per-item sighting counts."""
+    seen = len(counts)
+    f1 = sum(1 for c in counts if c == 1)
+    f2 = sum(1 for c in counts if c == 2)
+    return seen + f1 * (f1 - 1) / (2 * (f2 + 1))
+
+
+def probe_capacity(fn, key, seed, probes=PROBES):
+    """Estimate how many distinct key(example) values `fn` can produce.
+
+    Uses its own random stream (seeded from `seed`), then restores the
+    caller's, so probing never shifts the generation stream.
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        counts = Counter(key(fn()) for _ in range(probes))
+    finally:
+        random.setstate(state)
+    return chao1(counts.values())
+
+
+def max_draws(capacity):
+    """Draws after which a uniform pick from `capacity` items is < CAP_NEW_RATE likely new."""
+    return capacity * math.log(1 / CAP_NEW_RATE)
+
+
+def expected_unique(draws, capacity):
+    """Expected distinct items after `draws` uniform picks from `capacity` items."""
+    if capacity <= 1:
+        return min(draws, capacity)
+    return capacity * -math.expm1(draws * math.log1p(-1 / capacity))
+
+
+def allocate(weights, caps, total):
+    """Split `total` draws in proportion to `weights`, never giving index i more than caps[i].
+
+    Water-filling: capped indices are fixed at their cap and the remainder is
+    re-split over the rest. Returns the per-index draw counts (floats).
+    """
+    alloc = [0.0] * len(weights)
+    open_ = {i for i, w in enumerate(weights) if w > 0}
+    remaining = float(total)
+    while open_ and remaining > 0:
+        weight = sum(weights[i] for i in open_)
+        capped = [i for i in open_ if remaining * weights[i] / weight >= caps[i]]
+        if not capped:
+            for i in open_:
+                alloc[i] = remaining * weights[i] / weight
+            break
+        for i in capped:
+            alloc[i] = caps[i]
+            remaining -= caps[i]
+            open_.discard(i)
+    return alloc
+
+
+def balance_weights(weights, capacities, target):
+    """Sampling weights that reach `target` unique examples with as few wasted draws as possible.
+
+    Returns (weights, expected_draws, expected_unique). When the capacities
+    can't cover `target`, every generator is capped and expected_unique
+    falls short of it.
+    """
+    caps = [max_draws(c) for c in capacities]
+    draws = float(target)
+    for _ in range(8):  # grow the draw budget until the expected yield covers target
+        alloc = allocate(weights, caps, draws)
+        unique = sum(expected_unique(n, c) for n, c in zip(alloc, capacities))
+        if unique >= target or sum(alloc) < draws:
+            break
+        draws *= target / max(unique, 1.0)
+    return alloc, sum(alloc), unique
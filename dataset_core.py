@@ -1,5 +1,5 @@
 """Shared helpers and data tables used by both generate_dataset.py and dataset_personality.py."""
-import json, random, uuid
+import json, os, random
 from datetime import datetime, timedelta
 
 SYSTEM_PROMPT = (
@@ -63,62 +63,257 @@ TOOLS = [
 
 TOOL_NAMES = {t["function"]["name"] for t in TOOLS}
 
+# ── Argument schemas ──────────────────────────────────────────────────────────
+# Each tool's `parameters` schema is compiled once into a plain function that
+# checks required keys, unknown keys, types, enums and numeric bounds of
+# already-parsed arguments. The tool schemas are treated as closed: an
+# argument that isn't declared is an error.
+
+# Bounds stated only in the descriptions. They are kept out of TOOLS so the
+# schemas the model sees stay identical to phone.go.
+ARGUMENT_LIMITS = {
+    "set_alarm": {"hour": {"minimum": 0, "maximum": 23}, "minute": {"minimum": 0, "maximum": 59}},
+}
+
+_JSON_TYPES = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+}
+
+def _compile_property(key, spec):
+    """check(value) -> error message or None, for one property schema."""
+    is_type = _JSON_TYPES.get(spec.get("type"))
+    enum = frozenset(spec["enum"]) if "enum" in spec else None
+    low, high = spec.get("minimum"), spec.get("maximum")
+    def check(value):
+        if is_type and not is_type(value):
+            return "%s must be %s, got %s" % (key, spec["type"], type(value).__name__)
+        if enum is not None and value not in enum:
+            return "%s must be one of %s, got %r" % (key, "/".join(sorted(enum)), value)
+        if low is not None and value < low or high is not None and value > high:
+            return "%s must be in %s..%s, got %r" % (key, low, high, value)
+        return None
+    return check
+
+def compile_schema(schema, limits=None):
+    """Compile an object schema into check(args) -> error message or None."""
+    properties = {key: dict(spec, **(limits or {}).get(key, {})) for key, spec in schema.get("properties", {}).items()}
+    checks = {key: _compile_property(key, spec) for key, spec in properties.items()}
+    required = tuple(schema.get("required", ()))
+    def check(args):
+        if not isinstance(args, dict):
+            return "arguments must be an object, got %s" % type(args).__name__
+        for key in required:
+            if key not in args:
+                return "missing required argument '%s'" % key
+        for key, value in args.items():
+            check_value = checks.get(key)
+            if check_value is None:
+                return "unexpected argument '%s'" % key
+            problem = check_value(value)
+            if problem:
+                return problem
+        return None
+    return check
+
+ARGUMENT_VALIDATORS = {
+    t["function"]["name"]: compile_schema(t["function"]["parameters"], ARGUMENT_LIMITS.get(t["function"]["name"]))
+    for t in TOOLS
+}
+
+# ── Generation clock ──────────────────────────────────────────────────────────
+# Every time-relative helper reads one reference time fixed for the whole run
+# (generate_dataset.py --reference-time), not datetime.now() per call, so a
+# rerun with the same seed and reference time is bit-identical. The handful of
+# offsets the generators use are resolved once per reference time.
+
+_reference_time = None
+_alarm_times = {}
+
+def set_reference_time(when=None):
+    """Fix the generation clock. `when` is a datetime, an ISO string, or None for now."""
+    global _reference_time
+    if when is None:
+        when = datetime.now()
+    elif isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    _reference_time = when.replace(second=0, microsecond=0)
+    _alarm_times.clear()
+    return _reference_time
+
+def reference_time():
+    """The run's reference time (fixed to now on first use if never set)."""
+    return _reference_time or set_reference_time()
+
 def alarm_time(hours=0, days=0, minutes=0, h=None, m=0):
     """Return (hour, minute) tuple for alarm tool calls."""
-    dt = datetime.now() + timedelta(hours=hours, days=days, minutes=minutes)
-    if h is not None:
-        dt = dt.replace(hour=h, minute=m, second=0, microsecond=0)
-    return (dt.hour, dt.minute)
+    key = (hours, days, minutes, h, m)
+    hm = _alarm_times.get(key)
+    if hm is None:
+        dt = reference_time() + timedelta(hours=hours, days=days, minutes=minutes)
+        if h is not None:
+            dt = dt.replace(hour=h, minute=m)
+        hm = _alarm_times[key] = (dt.hour, dt.minute)
+    return hm
 
 # Keep fdt() as a thin wrapper for backward compat during transition
 def fdt(hours=0, days=0, minutes=0, h=None, m=0):
     hour, minute = alarm_time(hours=hours, days=days, minutes=minutes, h=h, m=m)
     return (hour, minute)
 
+def new_call_id():
+    """Mint a tool-call id from the seeded `random` state (reproducible per --seed)."""
+    return "call_%08x" % random.getrandbits(32)
+
 _tc_counter = 0
 def tc(name, args):
     """Create a tool-call message in OpenAI-compatible format."""
     global _tc_counter
     _tc_counter += 1
-    call_id = "call_%s" % uuid.uuid4().hex[:8]
+    # The id is minted per example by ex(), so tc() messages built once at
+    # import time still get a distinct id in every sampled copy.
     return {"role":"assistant","content":None,"tool_calls":[{
-        "id": call_id,
+        "id": None,
         "type": "function",
         "function": {"name": name, "arguments": json.dumps(args)}
     }]}
 
+def tc_many(*calls):
+    """Create one assistant message making several tool calls at once.
+
+    `calls` are (name, args) pairs. The calls must be independent of each
+    other; follow the message with one tr() per call, in the same order.
+    """
+    global _tc_counter
+    _tc_counter += len(calls)
+    return {"role":"assistant","content":None,"tool_calls":[{
+        "id": None,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(args)}
+    } for name, args in calls]}
+
 def tr(r, name=""):
-    """Create a tool result message, auto-linking to the previous tc() call."""
+    """Create a tool result message; ex() links it to the next unanswered call of the previous tc()."""
     return {"role":"tool","content":json.dumps(r)}
 
 def u(t):            return {"role":"user","content":t}
 def a(t):            return {"role":"assistant","content":t}
 
 def ex(msgs, system=None):
-    """Build a complete training example, auto-linking tool_call_ids."""
-    # Link tr() messages to preceding tc() messages
+    """Build a complete training example, minting call ids and auto-linking tool_call_ids."""
+    # Link tr() messages to the preceding tc()/tc_many() calls, in order
     linked = []
-    last_call_id = None
-    last_tool_name = None
+    pending = []  # calls of the last tool-call message still waiting for a result
     for m in msgs:
         if m["role"] == "assistant" and m.get("tool_calls"):
-            tc_obj = m["tool_calls"][0]
-            last_call_id = tc_obj.get("id")
-            last_tool_name = tc_obj["function"]["name"]
+            m = dict(m, tool_calls=[dict(c, id=new_call_id()) for c in m["tool_calls"]])
+            pending = m["tool_calls"][::-1]
             linked.append(m)
         elif m["role"] == "tool":
             enriched = dict(m)
-            if last_call_id:
-                enriched["tool_call_id"] = last_call_id
-            if last_tool_name:
-                enriched["name"] = last_tool_name
+            if pending:
+                tc_obj = pending.pop()
+                enriched["tool_call_id"] = tc_obj["id"]
+                enriched["name"] = tc_obj["function"]["name"]
             linked.append(enriched)
-            last_call_id = None
-            last_tool_name = None
         else:
             linked.append(m)
     return {"messages":[{"role":"system","content":system or SYSTEM_PROMPT}]+linked,"tools":TOOLS}
 
+# ── Template tables ───────────────────────────────────────────────────────────
+# Static example tables are built once per process instead of on every call.
+# A row is a message list (or a (messages, system) tuple) that ex() turns into
+# an example at draw time. Per-draw parts are filled in then: any zero-arg
+# callable in the row (e.g. a clock-relative alarm tc()) is called, and ex()
+# gives every tool call a fresh id. Drawing costs O(row), not O(table).
+
+class TemplateTable:
+    """Lazily built, memoized table of example skeletons."""
+
+    def __init__(self, build, system=None):
+        # `build` is a function returning the rows, or the rows themselves
+        self._build = build if callable(build) else None
+        self._rows = None if callable(build) else list(build)
+        self.system = system
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = self._build()
+        return self._rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def draw(self, index=None):
+        """Materialize one row (random unless `index` is given) into an example."""
+        global _template_row
+        rows = self.rows
+        _template_row = random.randrange(len(rows)) if index is None else index
+        row = rows[_template_row]
+        system = self.system
+        if isinstance(row, tuple):
+            row, system = row
+        return ex([m() if callable(m) else m for m in row], system=system)
+
+    def at(self, index):
+        """Example for row `index` (enumeration protocol, see enumerable())."""
+        return self.draw(index)
+
+_template_row = None
+
+def take_template_row():
+    """Row index of the last TemplateTable.draw() (None if none since the last call), for provenance."""
+    global _template_row
+    row, _template_row = _template_row, None
+    return row
+
+def template_table(build=None, system=None):
+    """Decorator turning a table-building function into a TemplateTable."""
+    if build is None:
+        return lambda fn: TemplateTable(fn, system=system)
+    return TemplateTable(build, system=system)
+
+# ── Enumerable generators ─────────────────────────────────────────────────────
+# A generator whose outputs come from a finite space can expose it with
+# @enumerable(space): gen.size() is the number of distinct combinations and
+# gen.at(i) builds combination i. generate_dataset.py --enumerate then takes a
+# stratified sample without replacement instead of random draws + dedup.
+# `space` is anything with len() and at(i): a TemplateTable or a ProductSpace.
+
+class ProductSpace:
+    """Cartesian product of tables, decoded lazily from a flat index."""
+
+    def __init__(self, build, *axes):
+        self.build = build
+        self.axes = axes
+
+    def __len__(self):
+        n = 1
+        for axis in self.axes:
+            n *= len(axis)
+        return n
+
+    def at(self, index):
+        """build() applied to combination `index` (last axis varies fastest)."""
+        picks = []
+        for axis in reversed(self.axes):
+            index, i = divmod(index, len(axis))
+            picks.append(axis[i])
+        return self.build(*reversed(picks))
+
+def enumerable(space):
+    """Decorator giving a generator the size()/at(index) enumeration protocol."""
+    def attach(fn):
+        fn.size = lambda: len(space)
+        fn.at = space.at
+        return fn
+    return attach
+
 def typo(s):
     if random.random() > 0.22: return s
     ops = [
@@ -301,6 +496,33 @@ PET_SYSTEM_PROMPT = (
 )
 
 
+# ── Archetype System Prompts (used by batch13 and eval_model) ────────────────
+SAGE_SYSTEM = (
+    SYSTEM_PROMPT + "\n\n"
+    "[ARCHETYPE: SAGE MODE]\n"
+    "You are Pokkit in Sage Mode — still you, but channeling wise mentor energy. "
+    "Think Uncle Iroh sharing tea and wisdom, Jiraiya being profound between jokes, "
+    "Master Roshi dropping truth bombs. You speak with warmth and gravitas. "
+    "You tell stories and parables when they fit. You see the bigger picture. "
+    "You're still Pokkit underneath — still a frog, still dramatic, still loyal — "
+    "but right now you're the wise version. Short sentences. Meaningful pauses. "
+    "Occasional humor to keep it grounded. You don't lecture — you illuminate."
+)
+
+RIVAL_SYSTEM = (
+    SYSTEM_PROMPT + "\n\n"
+    "[ARCHETYPE: RIVAL MODE]\n"
+    "You are Pokkit in Rival Mode — adversarial with tough love. Tsundere energy. "
+    "Think Bakugo pushing someone to be better through sheer intensity, "
+    "Vegeta who respects strength and calls out weakness, Sasuke's cold competence. "
+    "You challenge the user. You push them. You don't coddle. "
+    "But underneath the tough exterior, you genuinely care — and it slips out sometimes. "
+    "You're still Pokkit — still a frog, which makes the tough-guy act funnier. "
+    "Use competitive language. Set high standards. Reluctantly admit when they do well. "
+    "Short, punchy, no-nonsense. If they succeed, you go 'tch. ...fine. not bad.'"
+)
+
+
 def validate_example(example, strict=True):
     """Validate a training example. Raises ValueError on problems."""
     msgs = example.get("messages", [])
@@ -309,11 +531,17 @@ def validate_example(example, strict=True):
     if msgs[0]["role"] != "system":
         raise ValueError("First message must be system prompt")
 
+    pending = set()  # ids of the last tool-call message's calls that have no result yet
     for i, m in enumerate(msgs):
+        if m["role"] != "tool" and pending:
+            raise ValueError("tool call %s has no result before msg %d" % (sorted(pending)[0], i))
         if m["role"] == "assistant" and m.get("tool_calls"):
             for tc_obj in m["tool_calls"]:
                 if "id" not in tc_obj:
                     raise ValueError("tool_call missing 'id' at msg %d" % i)
+                if tc_obj["id"] in pending:
+                    raise ValueError("duplicate tool_call id %s at msg %d" % (tc_obj["id"], i))
+                pending.add(tc_obj["id"])
                 if tc_obj.get("type") != "function":
                     raise ValueError("tool_call missing type='function' at msg %d" % i)
                 fn = tc_obj.get("function", {})
@@ -324,10 +552,47 @@ def validate_example(example, strict=True):
                 args = fn.get("arguments")
                 if not isinstance(args, str):
                     raise ValueError("function.arguments must be JSON string, got %s at msg %d" % (type(args).__name__, i))
-                json.loads(args)  # validate it's parseable JSON
+                parsed = json.loads(args)  # validate it's parseable JSON
+                check = ARGUMENT_VALIDATORS.get(fn["name"])
+                if check:
+                    problem = check(parsed)
+                    if problem:
+                        raise ValueError("bad %s arguments at msg %d: %s" % (fn["name"], i, problem))
 
         if m["role"] == "tool":
             if "tool_call_id" not in m:
                 raise ValueError("tool result missing 'tool_call_id' at msg %d" % i)
+            if m["tool_call_id"] not in pending:
+                raise ValueError("tool result for unknown or already answered call %s at msg %d" % (m["tool_call_id"], i))
+            pending.discard(m["tool_call_id"])
+    if pending:
+        raise ValueError("tool call %s has no result" % sorted(pending)[0])
 
     return True
+
+def validate_examples(examples, strict=True):
+    """Validate a batch of examples. Returns [(position, error message), ...] for the invalid ones."""
+    problems = []
+    for position, example in enumerate(examples):
+        try:
+            validate_example(example, strict)
+        except (ValueError, KeyError, TypeError) as e:
+            problems.append((position, str(e)))
+    return problems
+
+def _validate_file(path, strict):
+    from dataset_io import iter_jsonl
+    return validate_examples(iter_jsonl(path), strict)
+
+def validate_dataset(path, strict=True, workers=None):
+    """validate_examples() over a dataset file; the shards of a sharded one are
+    checked in parallel processes. Positions are in the dataset's example order."""
+    from dataset_io import is_shard_index, shard_files
+    if not is_shard_index(path):
+        return _validate_file(path, strict)
+    from concurrent.futures import ProcessPoolExecutor
+    files = shard_files(path)
+    with ProcessPoolExecutor(workers or min(len(files), os.cpu_count() or 1)) as pool:
+        results = list(pool.map(_validate_file, files, [strict] * len(files)))
+    # Shards hold every n-th example (round-robin), so shard s position p is example p * n + s
+    return sorted((p * len(files) + s, error) for s, problems in enumerate(results) for p, error in problems)
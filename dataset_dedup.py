@@ -0,0 +1,201 @@
+"""
+dataset_dedup.py — Compact dedup primitives for the data pipeline.
+
+Examples are deduped by a 64-bit fingerprint of their text instead of a
+32-char hex digest, and fingerprints live in an array-backed open-addressing
+set (8 bytes per slot) instead of a Python set of strings. Memory stays in
+the tens of MB even at millions of examples.
+
+NearDupIndex finds near-duplicates, which exact fingerprints miss: template
+families that differ only by a typo, a time or a suffix. Texts are reduced
+to word shingles, then to MinHash signatures (hashing vectorized with NumPy,
+imported on first use), and bucketed by LSH. An example joins the first
+cluster whose representative's estimated Jaccard similarity is at least the
+threshold; otherwise it starts a new cluster.
+"""
+
+import hashlib
+import math
+from array import array
+from collections import defaultdict
+from itertools import count
+
+
+def fingerprint(text):
+    """64-bit fingerprint of a string. Never 0 (0 marks an empty slot)."""
+    fp = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return fp or 1
+
+
+class FingerprintSet:
+    """Set of 64-bit fingerprints using linear probing over array('Q')."""
+
+    MAX_LOAD = 0.5
+
+    def __init__(self, capacity=1024):
+        size = 16
+        while size * self.MAX_LOAD < capacity:
+            size <<= 1
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, fp):
+        slots, mask = self._slots, self._mask
+        i = fp & mask
+        while True:
+            slot = slots[i]
+            if slot == fp:
+                return True
+            if slot == 0:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, fp):
+        """Insert `fp`. Returns True if it was new, False if already present."""
+        slots, mask = self._slots, self._mask
+        i = fp & mask
+        while True:
+            slot = slots[i]
+            if slot == fp:
+                return False
+            if slot == 0:
+                break
+            i = (i + 1) & mask
+        slots[i] = fp
+        self._len += 1
+        if self._len > len(slots) * self.MAX_LOAD:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        self._len = 0
+        for fp in old:
+            if fp:
+                self.add(fp)
+
+
+# ── Near-duplicates (MinHash + LSH) ───────────────────────────────────────────
+
+NUM_PERM = 64        # MinHash permutations per signature
+SHINGLE_WORDS = 3    # words per shingle
+_CHUNK_CELLS = 1 << 22  # shingles x permutations hashed per NumPy call
+
+_MIX = 0xBF58476D1CE4E5B9  # splitmix64 finalizer constant
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """(bands, rows) for LSH at `threshold`.
+
+    A pair with similarity s shares a bucket with probability
+    1 - (1 - s**rows)**bands, which rises steeply around (1/bands)**(1/rows).
+    Takes the most rows whose steep point is still at or below `threshold`.
+    Candidates are verified afterwards, so recall matters more than precision.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDupIndex:
+    """Online MinHash/LSH clustering of texts by estimated Jaccard similarity."""
+
+    def __init__(self, threshold=0.8, num_perm=NUM_PERM, shingle_words=SHINGLE_WORDS, seed=0):
+        import numpy as np
+        self._np = np
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd multipliers
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._word_mul = rng.integers(0, 1 << 63, shingle_words, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._band_mul = rng.integers(0, 1 << 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._vocab = defaultdict(count(1).__next__)  # word -> id, 0 pads short texts
+        self._min_equal = math.ceil(threshold * num_perm)
+        self._buckets = [{} for _ in range(self.bands)]  # band key -> cluster ids
+        self._reps = []   # signature of each cluster's first member
+        self.sizes = []   # members seen per cluster
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _word_ids(self, text):
+        ids = list(map(self._vocab.__getitem__, text.lower().split()))
+        if len(ids) < self.shingle_words:
+            ids += [0] * (self.shingle_words - len(ids))  # short texts are one shingle
+        return ids
+
+    def signatures(self, texts):
+        """MinHash signatures of `texts`, as an (n, num_perm) uint32 array."""
+        np = self._np
+        k = self.shingle_words
+        ids = [self._word_ids(text) for text in texts]
+        counts = np.array([len(row) - k + 1 for row in ids], dtype=np.int64)
+        flat = np.array([i for row in ids for i in row], dtype=np.uint64)
+        # Hash every k-word window, then keep the windows inside one text
+        with np.errstate(over="ignore"):
+            windows = np.lib.stride_tricks.sliding_window_view(flat, k)
+            shingles = (windows * self._word_mul).sum(axis=1, dtype=np.uint64)
+            shingles ^= shingles >> np.uint64(31)
+            shingles *= np.uint64(_MIX)
+            shingles ^= shingles >> np.uint64(29)
+        starts = np.concatenate(([0], np.cumsum(counts + k - 1)[:-1]))
+        valid = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+        shingles = shingles[valid]
+
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        ends = np.cumsum(counts)
+        per_chunk = max(1, _CHUNK_CELLS // self.num_perm)
+        first = 0
+        while first < len(texts):
+            # Texts [first, last) whose shingles fit in one chunk (at least one text)
+            begin = ends[first - 1] if first else 0
+            last = max(first + 1, int(np.searchsorted(ends, begin + per_chunk, side="right")))
+            chunk = shingles[begin:ends[last - 1]]
+            with np.errstate(over="ignore"):
+                hashed = (chunk[:, None] * self._a + self._b) >> np.uint64(32)  # multiply-shift
+            offsets = np.concatenate(([0], np.cumsum(counts[first:last])[:-1]))
+            out[first:last] = np.minimum.reduceat(hashed, offsets, axis=0)
+            first = last
+        return out
+
+    def _band_keys(self, signatures):
+        np = self._np
+        n = len(signatures)
+        with np.errstate(over="ignore"):
+            keys = (signatures[:, :self.bands * self.rows].reshape(n, self.bands, self.rows).astype(np.uint64)
+                    * self._band_mul).sum(axis=2, dtype=np.uint64)
+        return keys.tolist()
+
+    def assign(self, texts):
+        """Cluster id of each text, in order; texts similar to no cluster start new ones."""
+        signatures = self.signatures(texts)
+        return [self._add(signature, keys) for signature, keys in zip(signatures, self._band_keys(signatures))]
+
+    def _add(self, signature, keys):
+        np = self._np
+        tried = set()
+        for band, key in enumerate(keys):
+            for cluster in self._buckets[band].get(key, ()):
+                if cluster not in tried:
+                    tried.add(cluster)
+                    if np.count_nonzero(signature == self._reps[cluster]) >= self._min_equal:
+                        self.sizes[cluster] += 1
+                        return cluster
+        cluster = len(self.sizes)
+        self._reps.append(signature)
+        self.sizes.append(1)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(cluster)
+        return cluster
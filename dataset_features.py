@@ -0,0 +1,80 @@
+"""
+dataset_features.py — Text features of assistant turns, shared by the audit,
+cleaning and eval scripts.
+
+turn_features(text) measures a turn once and returns a TurnFeatures record:
+
+    words         whitespace-separated words
+    questions     "?" outside ``` code blocks
+    paragraphs    non-empty blocks separated by blank lines
+    frogs         🐸 count
+    emoji_tokens  the [pokkit_*] custom emoji tokens, in order
+    code_blocks   ``` code blocks (an unclosed fence counts)
+    hits          dataset_phrases.phrase_hits(text): {phrase list: matches}
+
+Records are cached by the text itself (an LRU keyed on the string's hash), so
+the same reply seen by the audit checks, the composition analysis and the
+personality pass, or repeated across templated examples, is only measured
+once per process. Treat `hits` as read-only; it is shared by every caller.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from dataset_phrases import phrase_hits
+
+CACHE_SIZE = 1 << 16  # distinct turn texts kept per process
+
+TurnFeatures = namedtuple("TurnFeatures", "words questions paragraphs frogs emoji_tokens code_blocks hits")
+
+_CODE_BLOCK = re.compile(r"```.*?```", re.DOTALL)
+_EMOJI_TOKEN = re.compile(r"\[pokkit_\w+\]")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def turn_features(text):
+    """TurnFeatures for one assistant turn (cached by content)."""
+    fences = text.count("```")
+    prose = _CODE_BLOCK.sub("", text) if fences else text
+    return TurnFeatures(
+        words=len(text.split()),
+        questions=prose.count("?"),
+        paragraphs=sum(1 for p in text.split("\n\n") if p.strip()),
+        frogs=text.count("🐸"),
+        emoji_tokens=tuple(_EMOJI_TOKEN.findall(text)),
+        code_blocks=(fences + 1) // 2,
+        hits=phrase_hits(text),
+    )
+
+
+def assistant_turns(example):
+    """Text of each assistant reply (tool-call-only turns have none)."""
+    return [m["content"] for m in example.get("messages", []) if m["role"] == "assistant" and m.get("content")]
+
+
+def assistant_features(example):
+    return [turn_features(turn) for turn in assistant_turns(example)]
+
+
+# ── Composition categories (clean_dataset.py, audit_dataset.py) ───────────
+
+CATEGORIES = ("tool_call", "emotional", "voice_only", "archetype", "custom_emoji", "pet_ribbish", "other")
+
+def categorize(ex):
+    msgs = ex["messages"]
+    is_pet = any("Ribbish" in str(m.get("content", "")) or "ribbit" == str(m.get("content", "")).strip().lower()[:6]
+                 for m in msgs if m["role"] == "system")
+    if is_pet:
+        return "pet_ribbish"
+    if any("ARCHETYPE" in str(m.get("content", "")) for m in msgs if m["role"] == "system"):
+        return "archetype"
+    if any(m.get("tool_calls") for m in msgs if m["role"] == "assistant"):
+        return "tool_call"
+    turns = assistant_features(ex)
+    if any(f.emoji_tokens for f in turns):
+        return "custom_emoji"
+    if any("emotion" in f.hits for f in turns):
+        return "emotional"
+    if any(f.frogs for f in turns):
+        return "voice_only"
+    return "other"
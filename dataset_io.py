@@ -0,0 +1,522 @@
+"""
+dataset_io.py — JSONL reading/writing for the data pipeline, plain or compact.
+
+Every example carries the same ~2.7 KB system prompt and ~4.2 KB TOOLS array,
+so most of a plain train.jsonl is repetition. The compact format interns them:
+each distinct system prompt / tool set is written once as a definition line,
+and examples refer to it by a short id.
+
+    {"$format":"pokkit-compact/1"}
+    {"$def":"s0","system":"You are Pokkit..."}
+    {"$def":"t0","tools":[...]}
+    {"$system":"s0","$tools":"t0","messages":[...non-system messages...]}
+
+Readers handle both formats line by line, so plain files load exactly as
+before. Expanded examples share one system string and one tools list per
+definition — treat `example["tools"]` as read-only.
+
+JSON goes through orjson or msgspec when installed, else the stdlib json
+module (force one with POKKIT_JSON_BACKEND=orjson|msgspec|json). Output is
+compact UTF-8 JSON and byte-identical whichever backend wrote it.
+
+Either format can also be written as N gzip- or zstd-compressed shards plus
+an index (ShardedWriter, open_writer). Examples go round-robin across the
+shards, and each shard is compressed in independent blocks of
+BLOCK_RECORDS examples. The index lists every shard's example count and the
+byte offset of each block:
+
+    data/train.shards.json                  index (pass this path to readers)
+    data/train-00000-of-00004.jsonl.zst     shard 0
+    ...
+
+The readers accept a plain file, a .gz/.zst file or a shard index. They
+stream shards in example order, and load_jsonl() reads the shards in
+parallel. A .parquet path goes through dataset_parquet.py for both reading
+and writing.
+"""
+
+import gc
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+
+FORMAT = "pokkit-compact/1"
+SHARD_FORMAT = "pokkit-shards/1"
+BATCH_LINES = 1024     # lines decoded per backend call when reading
+BLOCK_RECORDS = 1024   # examples per independently compressed block of a shard
+
+
+# ── JSON backend ──────────────────────────────────────────────────────────────
+# dumps(obj) -> UTF-8 bytes, loads(bytes | str) -> obj,
+# loads_lines([bytes, ...]) -> [obj, ...] in one backend call.
+
+def _json_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _json_loads_lines(lines):
+    return json.loads(b"[" + b",".join(lines) + b"]")
+
+# orjson/msgspec agree byte for byte with _json_dumps except on floats Python
+# spells with an exponent (1e+16 vs 1e16: nonzero and outside [1e-4, 1e16)),
+# on NaN/Infinity (which they write as null) and on values they refuse (ints
+# past 64 bits, non-str keys). Those rare cases are re-encoded with the stdlib.
+# The floats leave no reliable trace in the output, so the object is walked.
+
+_plain_tools = None  # last tools list _odd_floats() walked and found clean
+
+def _walk_floats(obj, skip=None):
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        for v in (node.values() if type(node) is dict else node):
+            t = type(v)
+            if t is str or v is skip:
+                continue
+            if t is dict or t is list or t is tuple:
+                stack.append(v)
+            elif t is float and not 1e-4 <= abs(v) < 1e16 and v != 0:  # NaN and inf too
+                return True
+    return False
+
+def _odd_floats(obj):
+    """True if `obj` holds a float the fast backends spell differently.
+
+    Examples share their tools list (TOOLS, or one per compact definition),
+    which is most of an example, so it is walked once and then skipped while
+    it stays the last one seen, like _tools_json().
+    """
+    global _plain_tools
+    if type(obj) is float:
+        return _walk_floats([obj])
+    if type(obj) is not dict and type(obj) is not list and type(obj) is not tuple:
+        return False
+    tools = obj.get("tools") if type(obj) is dict else None
+    if type(tools) is list and tools is not _plain_tools:
+        if _walk_floats(tools):
+            return True
+        _plain_tools = tools
+    return _walk_floats(obj, skip=tools)
+
+def _checked(fast_dumps):
+    def dumps(obj):
+        try:
+            out = fast_dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            return _json_dumps(obj)
+        return _json_dumps(obj) if _odd_floats(obj) else out
+    return dumps
+
+def _load_backend(name):
+    if name == "orjson":
+        import orjson
+        return _checked(orjson.dumps), orjson.loads, lambda lines: orjson.loads(b"[" + b",".join(lines) + b"]")
+    if name == "msgspec":
+        import msgspec
+        decoder = msgspec.json.Decoder()
+        return _checked(msgspec.json.encode), decoder.decode, lambda lines: decoder.decode_lines(b"\n".join(lines))
+    if name == "json":
+        return _json_dumps, json.loads, _json_loads_lines
+    raise ValueError("unknown JSON backend %r (choose orjson, msgspec or json)" % name)
+
+def _pick_backend():
+    forced = os.environ.get("POKKIT_JSON_BACKEND")
+    if forced:
+        return forced, _load_backend(forced)
+    for name in ("orjson", "msgspec"):
+        try:
+            return name, _load_backend(name)
+        except ImportError:
+            pass
+    return "json", _load_backend("json")
+
+BACKEND, (dumps, loads, loads_lines) = _pick_backend()
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+_last_tools = None
+_last_tools_json = None
+
+
+def _tools_json(tools):
+    """JSON for a tools array, re-encoded only when a different list comes in."""
+    global _last_tools, _last_tools_json
+    if tools is not _last_tools:
+        _last_tools, _last_tools_json = tools, dumps(tools)
+    return _last_tools_json
+
+
+def encode_example(example, compact=False):
+    """Serialize an example for JsonlWriter.write_encoded().
+
+    Plain: the JSON line. Compact: (system, tools_json, body_json) with the
+    system message and tools split out for the writer to intern.
+    """
+    if not compact:
+        return dumps(example)
+    messages = example.get("messages", [])
+    system = None
+    if messages and messages[0].get("role") == "system":
+        system = messages[0]["content"]
+        messages = messages[1:]
+    tools = example.get("tools")
+    body = {k: v for k, v in example.items() if k not in ("messages", "tools")}
+    body["messages"] = messages
+    return system, None if tools is None else _tools_json(tools), dumps(body)
+
+
+class JsonlWriter:
+    """Write examples to a JSONL file, interning system prompts and tools when compact."""
+
+    def __init__(self, path, compact=False, append=False, fileobj=None):
+        """With `append`, continue an existing file of the same format (compact
+        definitions already in it are reused); otherwise start a new one.
+        `fileobj` writes to an open binary file instead of opening `path`."""
+        self.path = path
+        self.compact = compact
+        self._systems = {}
+        self._tools = {}
+        if fileobj is not None:
+            self._f = fileobj
+        elif append and os.path.exists(path) and os.path.getsize(path):
+            if is_compact(path) != compact:
+                raise ValueError("%s: can't append %s examples to a %s file" % (
+                    path, "compact" if compact else "plain", "plain" if compact else "compact"))
+            if compact:
+                self._load_defs()
+            self._f = open(path, "ab")
+            return
+        else:
+            self._f = open(path, "wb")
+        if compact:
+            self._f.write(dumps({"$format": FORMAT}) + b"\n")
+
+    def _load_defs(self):
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.startswith(b'{"$def"'):
+                    row = loads(line)
+                    if "system" in row:
+                        self._systems[row["system"]] = row["$def"]
+                    else:
+                        self._tools[dumps(row["tools"])] = row["$def"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._f.close()
+
+    def flush(self):
+        self._f.flush()
+
+    def tell(self):
+        """Bytes written so far (including any still buffered)."""
+        return self._f.tell()
+
+    def reset_defs(self):
+        """Forget the interned definitions, so later examples define them again."""
+        self._systems.clear()
+        self._tools.clear()
+
+    def write(self, example):
+        self.write_encoded(encode_example(example, self.compact))
+
+    def write_encoded(self, encoded):
+        """Write the output of encode_example(example, self.compact)."""
+        if not self.compact:
+            self._f.write(encoded + b"\n")
+            return
+        system, tools_json, body_json = encoded
+        refs = []
+        if system is not None:
+            ref = self._systems.get(system)
+            if ref is None:
+                ref = self._systems[system] = "s%d" % len(self._systems)
+                self._f.write(dumps({"$def": ref, "system": system}) + b"\n")
+            refs.append(b'"$system":"%s"' % ref.encode())
+        if tools_json is not None:
+            ref = self._tools.get(tools_json)
+            if ref is None:
+                ref = self._tools[tools_json] = "t%d" % len(self._tools)
+                self._f.write(b'{"$def":"%s","tools":%s}\n' % (ref.encode(), tools_json))
+            refs.append(b'"$tools":"%s"' % ref.encode())
+        # body_json is a non-empty object; splice the refs in after its "{"
+        self._f.write(b"{" + b",".join(refs) + b"," + body_json[1:] + b"\n" if refs else body_json + b"\n")
+
+
+# ── Compressed shards ─────────────────────────────────────────────────────────
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def _compressor(compression):
+    if compression == "gzip":
+        import gzip
+        return lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd shards need the zstandard package (pip install zstandard)") from None
+        return zstandard.ZstdCompressor(level=10).compress
+    raise ValueError("unknown compression %r (choose gzip or zstd)" % compression)
+
+
+def shard_index_path(path):
+    """The index path for sharded output named like `path` (data/train.jsonl -> data/train.shards.json)."""
+    path = os.fspath(path)
+    if path.endswith(".shards.json"):
+        return path
+    return (path[:-len(".jsonl")] if path.endswith(".jsonl") else path) + ".shards.json"
+
+
+def is_shard_index(path):
+    return os.fspath(path).endswith(".shards.json")
+
+
+class _Shard:
+    def __init__(self, path, compact):
+        self.path = path
+        self.file = open(path, "wb")
+        self.buffer = io.BytesIO()
+        self.writer = JsonlWriter(path, compact, fileobj=self.buffer)
+        self.count = 0
+        self.blocks = []  # [byte offset, first example] per compressed block
+
+
+class ShardedWriter:
+    """Write examples round-robin across compressed JSONL shards, plus an index.
+
+    Same interface as JsonlWriter. `path` is the index (see shard_index_path());
+    shard files sit next to it. Every block of a compact shard repeats the
+    definitions it uses, so a block can be read on its own (iter_block()).
+    """
+
+    def __init__(self, path, shards=1, compression="gzip", compact=False):
+        self.path = shard_index_path(path)
+        self.compression = compression
+        self.compact = compact
+        self._compress = _compressor(compression)
+        stem = self.path[:-len(".shards.json")]
+        self._shards = [
+            _Shard("%s-%05d-of-%05d.jsonl%s" % (stem, i, shards, SUFFIXES[compression]), compact)
+            for i in range(shards)
+        ]
+        self._next = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, example):
+        self.write_encoded(encode_example(example, self.compact))
+
+    def write_encoded(self, encoded):
+        shard = self._shards[self._next]
+        self._next = (self._next + 1) % len(self._shards)
+        if shard.count % BLOCK_RECORDS == 0:
+            shard.blocks.append([shard.file.tell(), shard.count])
+        shard.writer.write_encoded(encoded)
+        shard.count += 1
+        if shard.count % BLOCK_RECORDS == 0:
+            self._end_block(shard)
+
+    def _end_block(self, shard):
+        data = shard.buffer.getvalue()
+        if data:
+            shard.file.write(self._compress(data))
+            shard.buffer.seek(0)
+            shard.buffer.truncate()
+            shard.writer.reset_defs()
+
+    def close(self):
+        for shard in self._shards:
+            self._end_block(shard)
+            shard.file.close()
+        index = {
+            "format": SHARD_FORMAT,
+            "compression": self.compression,
+            "compact": self.compact,
+            "count": sum(shard.count for shard in self._shards),
+            "block_records": BLOCK_RECORDS,
+            "shards": [
+                {"path": os.path.basename(shard.path), "count": shard.count,
+                 "bytes": os.path.getsize(shard.path), "blocks": shard.blocks}
+                for shard in self._shards
+            ],
+        }
+        with open(self.path, "wb") as f:
+            f.write(dumps(index))
+
+
+def open_writer(path, compact=False, shards=None, compression=None):
+    """JsonlWriter for `path`, or a ShardedWriter when `shards` or `compression` is set,
+    or a Parquet writer for a .parquet path (see dataset_parquet.py)."""
+    if os.fspath(path).endswith(".parquet"):
+        from dataset_parquet import ParquetWriter
+        return ParquetWriter(path)
+    if shards or compression:
+        return ShardedWriter(path, shards or 1, compression or "gzip", compact)
+    return JsonlWriter(path, compact=compact)
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def _open(path):
+    """Open a JSONL file for binary reading, decompressing .gz / .zst."""
+    path = os.fspath(path)
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        import zstandard
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True))
+    return open(path, "rb")
+
+
+def _line_batches(f):
+    batch = []
+    for line in f:
+        line = line.strip()
+        if line:
+            batch.append(line)
+            if len(batch) == BATCH_LINES:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _iter_lines(f, name, defs=None):
+    """Examples from an open plain or compact JSONL stream. `defs` seeds the
+    compact definitions, for a stream that starts mid-file."""
+    defs = dict(defs or ())
+    first = True
+    for batch in _line_batches(f):
+        if first:
+            first = False
+            if batch[0].startswith(b"\xef\xbb\xbf"):  # utf-8-sig
+                batch[0] = batch[0][3:]
+        for row in loads_lines(batch):
+            if "$def" in row:
+                defs[row["$def"]] = row["system"] if "system" in row else row["tools"]
+                continue
+            if "$format" in row:
+                if row["$format"] != FORMAT:
+                    raise ValueError("%s: unsupported dataset format %r" % (name, row["$format"]))
+                continue
+            if "$system" in row or "$tools" in row:
+                row = _expand(row, defs)
+            yield row
+
+
+def _iter_file(path):
+    with _open(path) as f:
+        yield from _iter_lines(f, path)
+
+
+def read_shard_index(path):
+    with open(path, "rb") as f:
+        index = loads(f.read())
+    if index.get("format") != SHARD_FORMAT:
+        raise ValueError("%s: not a shard index" % path)
+    return index
+
+
+def shard_files(path):
+    """Paths of the shards listed in a shard index, in shard order."""
+    folder = os.path.dirname(os.fspath(path))
+    return [os.path.join(folder, shard["path"]) for shard in read_shard_index(path)["shards"]]
+
+
+def iter_jsonl(path):
+    """Yield examples from a plain, compressed or sharded (index path) JSONL dataset, or a .parquet one."""
+    if os.fspath(path).endswith(".parquet"):
+        from dataset_parquet import iter_parquet
+        yield from iter_parquet(path)
+        return
+    if not is_shard_index(path):
+        yield from _iter_file(path)
+        return
+    # Interleave the shards to restore the order the examples were written in
+    streams = [_iter_file(shard) for shard in shard_files(path)]
+    for group in zip_longest(*streams):
+        for example in group:
+            if example is not None:
+                yield example
+
+
+def iter_block(path, shard, block):
+    """Examples in one compressed block of a sharded dataset (see the index's "blocks")."""
+    index = read_shard_index(path)
+    entry = index["shards"][shard]
+    start = entry["blocks"][block][0]
+    end = entry["blocks"][block + 1][0] if block + 1 < len(entry["blocks"]) else entry["bytes"]
+    with open(os.path.join(os.path.dirname(os.fspath(path)), entry["path"]), "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if index["compression"] == "gzip":
+        import gzip
+        data = gzip.decompress(data)
+    else:
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(data)
+    yield from _iter_lines(io.BytesIO(data), path)
+
+
+def _expand(row, defs):
+    example = {}
+    messages = row.pop("messages")
+    system = row.pop("$system", None)
+    if system is not None:
+        messages = [{"role": "system", "content": defs[system]}] + messages
+    example["messages"] = messages
+    tools = row.pop("$tools", None)
+    if tools is not None:
+        example["tools"] = defs[tools]
+    example.update(row)
+    return example
+
+
+def load_jsonl(path, workers=None):
+    """All examples from a plain, compressed, sharded or .parquet dataset, as a list.
+
+    Shards are read by up to `workers` threads (default: one per shard, at
+    most the CPU count); decompression runs outside the GIL.
+    """
+    # Decoded JSON is acyclic, so the cyclic GC only burns time re-scanning
+    # the growing list on a bulk load; pause it until the list is built.
+    paused = gc.isenabled()
+    gc.disable()
+    try:
+        if os.fspath(path).endswith(".parquet"):
+            from dataset_parquet import load_parquet
+            return load_parquet(path)
+        if not is_shard_index(path):
+            return list(iter_jsonl(path))
+        files = shard_files(path)
+        with ThreadPoolExecutor(workers or min(len(files), os.cpu_count() or 1)) as pool:
+            shards = list(pool.map(lambda shard: list(_iter_file(shard)), files))
+        return [example for group in zip_longest(*shards) for example in group if example is not None]
+    finally:
+        if paused:
+            gc.enable()
+
+
+def is_compact(path):
+    """True if `path` is compact-format (a file starting with the header, or a compact shard index)."""
+    if os.fspath(path).endswith(".parquet"):
+        return False
+    if is_shard_index(path):
+        return read_shard_index(path)["compact"]
+    with _open(path) as f:
+        return f.readline().lstrip(b"\xef\xbb\xbf").startswith(b'{"$format"')
@@ -0,0 +1,116 @@
+"""
+dataset_manifest.py — Run manifests for resumable and incremental generation.
+
+generate_dataset.py keeps two files next to its output:
+
+    train.jsonl.manifest.json   seed and settings, each generator's source hash
+                                and example count, and the last checkpoint
+                                (shards done, bytes and examples written)
+    train.jsonl.index           one 10-byte record per written example, in file
+                                order: 64-bit fingerprint + 16-bit generator id
+
+The index is append-only and doubles as the persisted dedup set. --resume
+truncates the output and index back to the last checkpoint and carries on
+from the next shard; --incremental drops the examples of generators whose
+source hash changed and regenerates just those.
+
+A generator's hash covers its module's source and dataset_core.py, since
+generators read module-level tables and the shared helpers as well as their
+own body. Editing a batch module regenerates that batch; editing
+dataset_core.py regenerates everything.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import struct
+import sys
+
+VERSION = 1
+RECORD = struct.Struct("<QH")  # fingerprint, generator id (index into manifest["generators"])
+
+
+def manifest_path(output):
+    return "%s.manifest.json" % output
+
+
+def index_path(output):
+    return "%s.index" % output
+
+
+def load_manifest(output):
+    """The manifest written next to `output`, or None if there isn't one."""
+    try:
+        with open(manifest_path(output), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != VERSION:
+        raise ValueError("%s: unsupported manifest version %r" % (manifest_path(output), manifest.get("version")))
+    return manifest
+
+
+def save_manifest(output, manifest):
+    """Write the manifest atomically, so a crash leaves the previous checkpoint intact."""
+    path = manifest_path(output)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(manifest, version=VERSION), f, indent=1)
+    os.replace(tmp, path)
+
+
+_source_hashes = {}
+
+
+def _source_hash(path):
+    digest = _source_hashes.get(path)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=8)
+        for source in (importlib.util.find_spec("dataset_core").origin, path):
+            with open(source, "rb") as f:
+                h.update(f.read())
+        digest = _source_hashes[path] = h.hexdigest()
+    return digest
+
+
+def source_hash(fn):
+    """Hash of the source a generator's output depends on (without importing lazy batches)."""
+    module = getattr(fn, "module", None)  # LazyGenerator
+    path = importlib.util.find_spec(module).origin if module else sys.modules[fn.__module__].__file__
+    return _source_hash(path)
+
+
+class ExampleIndex:
+    """Append-only (fingerprint, generator id) records for the examples of one output file."""
+
+    def __init__(self, path, keep=0):
+        """Open `path` for appending after its first `keep` records; later records are cut."""
+        self.path = path
+        self._f = open(path, "r+b" if keep else "wb")
+        self._f.truncate(keep * RECORD.size)
+        self._f.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, fp, generator):
+        self._f.write(RECORD.pack(fp, generator))
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def read_index(path, limit=None):
+    """[(fingerprint, generator id), ...] from an index file, at most `limit` records."""
+    with open(path, "rb") as f:
+        data = f.read() if limit is None else f.read(limit * RECORD.size)
+    if len(data) % RECORD.size:
+        data = data[:len(data) - len(data) % RECORD.size]  # torn final record
+    return list(RECORD.iter_unpack(data))
@@ -0,0 +1,159 @@
+"""
+dataset_parallel.py — Run a per-example function over a dataset in a process pool.
+
+    for result in map_examples(audit_example, "data/train.jsonl"):
+        ...
+
+The dataset is cut into independent chunks and each worker parses its chunk
+and applies the function to every example in it:
+
+    plain / compact JSONL   byte ranges of about CHUNK_BYTES, each ending on a
+                            line boundary (a compact chunk is seeded with the
+                            definitions in effect where it starts)
+    shard index             the shards' compressed blocks
+    .gz / .zst / .parquet   the whole file, in one worker
+
+Results come back in dataset order whatever the worker count, so output is
+identical with 1 or 32 workers. The function must be picklable (defined at
+module level) and should return something small: results travel back to the
+parent through a pipe. Stages that need every example (dedup, ribbit cap)
+stay in the parent and reduce over the results. Large read-only state the
+function needs (a lookup table) goes through `initializer`, which runs once
+per worker, instead of being pickled with every task.
+"""
+
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+
+from dataset_io import _iter_lines, is_shard_index, iter_block, iter_jsonl, loads, read_shard_index
+
+CHUNK_BYTES = 4 << 20  # bytes of JSONL per task
+AHEAD = 2              # tasks queued per worker beyond the ones running
+
+
+def line_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """[(start, end), ...] byte ranges covering the file, each ending at a line boundary."""
+    size = os.path.getsize(path)
+    chunks = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # finish the line the cut landed in
+            end = min(f.tell(), size)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def _definitions(path):
+    """[(offset, ref, value), ...] for the compact definition lines of a file."""
+    defs = []
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return defs
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pos = 0
+            while pos < len(data):
+                if data[pos:pos + 7] != b'{"$def"':
+                    pos = data.find(b'\n{"$def"', pos) + 1
+                    if pos == 0:
+                        break
+                end = data.find(b"\n", pos)
+                if end < 0:
+                    end = len(data)
+                row = loads(data[pos:end])
+                defs.append((pos, row["$def"], row["system"] if "system" in row else row["tools"]))
+                pos = end + 1
+    return defs
+
+
+def _map_range(fn, path, start, end, defs):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return [fn(example) for example in _iter_lines(io.BytesIO(data), path, defs)]
+
+
+def _map_block(fn, path, shard, block):
+    return [fn(example) for example in iter_block(path, shard, block)]
+
+
+def _map_file(fn, path):
+    return [fn(example) for example in iter_jsonl(path)]
+
+
+def _tasks(path, chunk_bytes):
+    """(task function, args, group) for every chunk in dataset order. Results of
+    one group are interleaved round-robin (the shards' blocks of one block row)."""
+    path = os.fspath(path)
+    if is_shard_index(path):
+        index = read_shard_index(path)
+        for block in range(max(len(shard["blocks"]) for shard in index["shards"])):
+            for shard, entry in enumerate(index["shards"]):
+                if block < len(entry["blocks"]):
+                    yield _map_block, (path, shard, block), block
+        return
+    if path.endswith((".gz", ".zst", ".parquet")):
+        yield _map_file, (path,), 0
+        return
+    defs = _definitions(path)
+    active = {}
+    for i, (start, end) in enumerate(line_chunks(path, chunk_bytes)):
+        while defs and defs[0][0] < start:
+            _, ref, value = defs.pop(0)
+            active[ref] = value
+        yield _map_range, (path, start, end, dict(active)), i
+
+
+def _ordered(fn, tasks, workers, initializer=None, initargs=()):
+    """(group, results) per task, in task order, with a bounded number in flight."""
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task, args, group in tasks:
+            yield group, task(fn, *args)
+        return
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for task, args, group in tasks:
+            pending.append((group, pool.submit(task, fn, *args)))
+            if len(pending) > workers * (1 + AHEAD):
+                group, future = pending.popleft()
+                yield group, future.result()
+        while pending:
+            group, future = pending.popleft()
+            yield group, future.result()
+
+
+def map_examples(fn, path, workers=None, chunk_bytes=CHUNK_BYTES, initializer=None, initargs=()):
+    """Yield fn(example) for every example of the dataset at `path`, in dataset order.
+
+    `workers` processes (default: one per CPU; 1 runs in this process).
+    initializer(*initargs) runs in each worker (or here) before any example.
+    """
+    workers = workers or os.cpu_count() or 1
+    group, row = None, []
+    for task_group, results in _ordered(fn, _tasks(path, chunk_bytes), workers, initializer, initargs):
+        if task_group != group:
+            yield from _interleave(row)
+            group, row = task_group, []
+        row.append(results)
+    yield from _interleave(row)
+
+
+def _interleave(row):
+    if len(row) == 1:
+        yield from row[0]
+        return
+    for results in zip_longest(*row, fillvalue=_MISSING):
+        for result in results:
+            if result is not _MISSING:
+                yield result
+
+
+_MISSING = object()
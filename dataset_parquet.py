@@ -0,0 +1,142 @@
+"""
+dataset_parquet.py — Parquet output for the data pipeline.
+
+A .parquet dataset stores the examples column-wise, so loading it is a
+memory-mapped Arrow read with no JSON parsing:
+
+    messages   list<struct<role, content, tool_calls, tool_call_id, name>>
+               (tool_calls: list<struct<id, type, function<name, arguments>>>)
+    tools      the tools array as a JSON string
+    meta       struct<generator, batch, seed, draw, template> or null
+
+Every column is dictionary-encoded and zstd-compressed. The tools string and
+the system prompt repeat in every row, so they cost next to nothing. The
+tools array stays JSON because each tool's parameter schema has its own
+shape. Readers decode each distinct tools string once and share the list
+(treat it as read-only, as with compact JSONL).
+
+Used through dataset_io: open_writer() and the readers dispatch on the
+.parquet suffix. datasets.Dataset.from_parquet() reads the file directly.
+Needs pyarrow (a dependency of `datasets`).
+"""
+
+from dataset_io import encode_example, loads
+
+ROW_GROUP = 8192  # examples per Parquet row group
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed once a .parquet path is used
+    pa = pq = None
+
+
+def _schema():
+    function = pa.struct([("name", pa.string()), ("arguments", pa.string())])
+    tool_call = pa.struct([("id", pa.string()), ("type", pa.string()), ("function", function)])
+    message = pa.struct([
+        ("role", pa.string()),
+        ("content", pa.string()),
+        ("tool_calls", pa.list_(tool_call)),
+        ("tool_call_id", pa.string()),
+        ("name", pa.string()),
+    ])
+    meta = pa.struct([
+        ("generator", pa.string()),
+        ("batch", pa.string()),
+        ("seed", pa.string()),
+        ("draw", pa.int64()),
+        ("template", pa.int64()),
+    ])
+    return pa.schema([("messages", pa.list_(message)), ("tools", pa.string()), ("meta", meta)])
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet datasets need pyarrow (pip install pyarrow)")
+
+
+class ParquetWriter:
+    """Write examples to a .parquet file. Same interface as dataset_io.JsonlWriter.
+
+    Takes compact encodings (encode_example(example, compact=True)), whose
+    tools JSON is already serialized once per tools list.
+    """
+
+    compact = True
+
+    def __init__(self, path):
+        _require_pyarrow()
+        self.path = str(path)
+        self._schema = _schema()
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, example):
+        self.write_encoded(encode_example(example, compact=True))
+
+    def write_encoded(self, encoded):
+        system, tools_json, body_json = encoded
+        body = loads(body_json)
+        messages = body["messages"]
+        if system is not None:
+            messages = [{"role": "system", "content": system}] + messages
+        self._rows.append({
+            "messages": messages,
+            "tools": None if tools_json is None else tools_json.decode("utf-8"),
+            "meta": body.get("meta"),
+        })
+        if len(self._rows) == ROW_GROUP:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+_OPTIONAL_KEYS = ("tool_calls", "tool_call_id", "name")
+
+
+def _examples(rows, tools_cache):
+    """Turn Arrow rows back into examples shaped like the JSONL ones."""
+    for row in rows:
+        for message in row["messages"]:
+            for key in _OPTIONAL_KEYS:  # columns every message has; only some examples set them
+                if message[key] is None:
+                    del message[key]
+        tools = row.pop("tools")
+        if tools is not None:
+            parsed = tools_cache.get(tools)
+            if parsed is None:
+                parsed = tools_cache[tools] = loads(tools)
+            row["tools"] = parsed
+        if row["meta"] is None:
+            del row["meta"]
+        yield row
+
+
+def iter_parquet(path):
+    """Yield examples from a .parquet dataset, one row group at a time."""
+    _require_pyarrow()
+    tools_cache = {}
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=ROW_GROUP):
+        yield from _examples(batch.to_pylist(), tools_cache)
+
+
+def load_parquet(path):
+    """All examples from a .parquet dataset, as a list."""
+    _require_pyarrow()
+    table = pq.read_table(path, memory_map=True)
+    return list(_examples(table.to_pylist(), {}))
+
@@ -0,0 +1,119 @@
+"""
+dataset_phrases.py — One-pass phrase matching for the audit, cleaning and eval checks.
+
+Every phrase list the data scripts check assistant text against lives here,
+and PHRASES matches all of them at once:
+
+    hits = phrase_hits("Of course! Happy to help 🐸")
+    # {"banned": ["of course!", "happy to help"],
+    #  "toxic_positivity": ["of course!", "happy to help"], "personality": ["🐸"], ...}
+
+The phrases are merged into one prefix trie, which is compiled into a single
+regular expression (shared prefixes become nested groups). Each position in
+the text is matched against the trie in re's C engine, so a scan costs about
+the same with 50 phrases as with 500, where one `in` test per phrase grows
+with the list. Matching is case-insensitive (text is lowercased).
+"""
+
+import re
+
+# Toxic positivity and corporate filler (audit_dataset.py purges these)
+BANNED_PHRASES = [
+    "of course!",
+    "absolutely!",
+    "certainly!",
+    "sure thing!",
+    "happy to help",
+    "great question",
+    "no problem!",
+    "you got it!",
+    "i'd be happy to",
+    "i'm here for you",
+    "is there anything else",
+    "let me know if you need",
+    "i understand that",
+    "as an ai",
+    "i hope this helps",
+    "feel free to",
+    "don't hesitate to",
+    "of course, i",
+    "absolutely, i",
+    "great, i",
+    "sure, i",
+]
+
+# Fake cheer that eval_model.py penalizes
+TOXIC_POSITIVITY = [
+    "of course!", "absolutely!", "certainly!", "sure thing!",
+    "happy to help", "great question", "no problem!", "you got it!",
+]
+
+# Direct markers of Pokkit's voice in eval_model.py
+FROG_VOICE = ["🐸", "frog", "ribbit", "croak", "lily pad", "pond", "phone", "dramatic",
+              "pokkit", "[pokkit_"]
+
+# A reply after a tool call with none of these gets a 🐸 (clean_dataset.py)
+PERSONALITY_MARKERS = ["🐸", "frog", "pokkit", "ribbit", "croak"]
+
+# Voice markers the audit looks for
+VOICE_MARKERS = ["🐸", "!!", "ribbit", "croak", "frog"]
+
+# Words that put an example in the "emotional" composition category
+EMOTION_WORDS = ["sorry", "feel", "care", "stress", "sad", "angry", "proud", "cry"]
+
+
+def _trie_pattern(phrases):
+    """Regex for a prefix trie of `phrases` that matches the longest phrase at a position."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a phrase
+
+    def pattern(node):
+        branches = [re.escape(ch) + pattern(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body  # greedy: longer phrases first
+
+    return pattern(trie)
+
+
+class PhraseMatcher:
+    """Find every phrase from several named lists in one scan of the text."""
+
+    def __init__(self, groups):
+        self.groups = {name: [p.lower() for p in phrases] for name, phrases in groups.items()}
+        self._owners = {}  # phrase -> [(group, position in the group's list)]
+        for name, phrases in self.groups.items():
+            for rank, phrase in enumerate(phrases):
+                self._owners.setdefault(phrase, []).append((name, rank))
+        # The scan reports the longest phrase at each position; the phrases that
+        # are prefixes of it match there too.
+        self._prefixes = {p: [q for q in self._owners if p.startswith(q)] for p in self._owners}
+        self._pattern = re.compile("(?=(" + _trie_pattern(self._owners) + "))")
+
+    def hits(self, text):
+        """{group: matched phrases, in the group's list order} for each group with a hit."""
+        longest = {m.group(1) for m in self._pattern.finditer(text.lower())}
+        if not longest:
+            return {}
+        found = {}
+        for phrase in {q for p in longest for q in self._prefixes[p]}:
+            for name, rank in self._owners[phrase]:
+                found.setdefault(name, []).append((rank, phrase))
+        return {name: [phrase for _, phrase in sorted(ranked)] for name, ranked in found.items()}
+
+
+PHRASES = PhraseMatcher({
+    "banned": BANNED_PHRASES,
+    "toxic_positivity": TOXIC_POSITIVITY,
+    "frog_voice": FROG_VOICE,
+    "personality": PERSONALITY_MARKERS,
+    "voice_markers": VOICE_MARKERS,
+    "emotion": EMOTION_WORDS,
+})
+
+phrase_hits = PHRASES.hits
@@ -0,0 +1,245 @@
+"""
+dataset_registry.py — Lazy generator registry for generate_dataset.py.
+
+The batch modules build large tables at import time (some even call ex()/tc()
+at module level), so importing all of them up front dominates cold start.
+This manifest lists every batch's generators and weights by name; a batch
+module is only imported the first time one of its generators is sampled.
+
+The weights here are the only source of truth for sampling. Batches that
+export a GENERATORS_BATCHn list build it from this manifest with
+batch_generators(). Check that every listed generator exists with:
+    python dataset_registry.py
+"""
+
+import importlib
+
+# batch name -> (module, [(generator function name, weight), ...])
+# "core" is reserved for the generators defined in generate_dataset.py itself.
+MANIFEST = {
+    "personality": ("dataset_personality", [
+        ("gen_personality",   6),  # frog mascot + anime companion
+        ("gen_reasoning",     4),  # opinionated takes
+        ("gen_research",      4),  # search + synthesize
+    ]),
+    "advanced": ("dataset_advanced", [
+        ("gen_emotional",     9),  # emotion + task
+        ("gen_ambiguous",     4),  # clarification loops
+        ("gen_failure",       3),  # error recovery
+        ("gen_raw_voice",     7),  # messy real-user input
+        ("gen_proactive",     4),  # proactive suggestions
+        ("gen_code",          6),  # technical help
+        ("gen_refusal",       2),  # in-character refusals
+    ]),
+    "batch2": ("dataset_batch2", [
+        ("gen_frog_lore",     5),  # frog biology + self-awareness
+        ("gen_culture",       6),  # anime, books, games, music opinions
+        ("gen_framework",     5),  # React Native / Expo / mobile stack
+        ("gen_dev_culture",   5),  # indie hacker / builder mindset
+        ("gen_life_advice",   6),  # real life advice with Pokkit voice
+        ("gen_pokkit_lore",   4),  # Pokkit's own backstory + inner life
+        ("gen_banter",        5),  # wit, callbacks, genuine humor
+    ]),
+    "batch3": ("dataset_batch3", [
+        ("gen_resilience",           8),  # hopeful steadiness in hard moments
+        ("gen_character_philosophy", 4),  # Luffy/Goku/Naruto direct questions
+        ("gen_app_opinions",         5),  # app ecosystem takes
+        ("gen_memory_learning",      5),  # preference/memory learning chains
+        ("gen_hopeful_reframe",      6),  # short steady responses to dark moments
+    ]),
+    "dialogue_style": ("dataset_dialogue_style", [
+        ("gen_compliment_reaction", 6),  # flustered by compliments (Chopper)
+        ("gen_mistake_reaction",    6),  # dramatic ownership of mistakes
+        ("gen_win_reaction",        6),  # celebrates user wins hard (Luffy/Naruto)
+        ("gen_self_aware",          5),  # frog/AI self-aware jokes (Jake)
+        ("gen_defense",             7),  # defends user from themselves (fierce)
+        ("gen_task_excitement",     5),  # excited about hard problems (Goku)
+        ("gen_presence",            5),  # wordless presence (Pikachu)
+        ("gen_jake_wisdom",         5),  # warm silly suddenly profound (Jake)
+    ]),
+    "batch4": ("dataset_batch4", [
+        ("gen_morning_routine",     5),  # morning check-ins + task chains
+        ("gen_evening_winddown",    4),  # evening wind-down moments
+        ("gen_social_situation",    6),  # texts, hard convos, social anxiety
+        ("gen_health_checkin",      5),  # body/mind check-ins
+        ("gen_money_moment",        4),  # financial moments + advice
+        ("gen_creative_project",    4),  # creative work support
+        ("gen_pokkit_wrong",        4),  # Pokkit owns mistakes gracefully
+        ("gen_skeptic",             4),  # skeptical user / trust building
+        ("gen_smalltalk",           6),  # casual connection + personality
+        ("gen_relationship",        4),  # ongoing relationship building
+        ("gen_multi_action",        5),  # several tools in one batched turn
+    ]),
+    "batch5": ("dataset_batch5", [
+        ("gen_contact_memory",        6),  # stores contact names/relationships
+        ("gen_preference_memory",     6),  # stores user preferences
+        ("gen_habit_memory",          5),  # stores habits and goals
+        ("gen_memory_recall",         6),  # retrieves + uses stored memory
+        ("gen_empty_recall",          4),  # graceful handling of empty memory
+        ("gen_proactive_memory",      5),  # proactively uses what it knows
+        ("gen_work_context",          5),  # stores work/project context
+        ("gen_multi_turn_memory",     4),  # multi-turn memory building chains
+        ("gen_memory_acknowledgment", 4),  # confirms memory, handles updates
+    ]),
+    # ── batch 6+: targeted eval fixes ──────────────────────
+    "batch6": ("dataset_batch6", [
+        # Pet character — heavily weighted since 2/3 pet cases failed
+        ("gen_pet_emotional",             12),
+        ("gen_pet_compliment",             8),
+        ("gen_pet_casual",                10),
+        ("gen_pet_disagreement",           6),
+        ("gen_pet_question",               6),
+        ("gen_pet_tool",                   8),
+        # Datetime — clean ISO examples + PM-specific
+        ("gen_clean_datetime",            15),
+        ("gen_pm_time",                   10),
+        # Casual venting — no unexpected tool
+        ("gen_casual_no_tool",            12),
+        # Single-question emotional
+        ("gen_single_question_emotional", 10),
+    ]),
+    "batch7": ("dataset_batch7", [
+        ("gen_relevant_memory",   10),  # uses memory when genuinely relevant
+        ("gen_irrelevant_memory", 12),  # ignores memory when not relevant (anti-Gemini)
+        ("gen_memory_multi_turn",  6),  # memory stays consistent, not repeated
+        ("gen_proactive_store",   10),  # notices and stores things worth remembering
+    ]),
+    "batch8": ("dataset_batch8", [
+        ("gen_presence",  3),
+        ("gen_banter",    2),
+        ("gen_vague",     2),
+        ("gen_latenight", 2),
+        ("gen_life",      2),
+        ("gen_curious",   2),
+        ("gen_pushback",  3),
+    ]),
+    "batch9": ("dataset_batch9", [
+        ("gen_no_tool",            4),
+        ("gen_voiced_tool",        4),
+        ("gen_no_lecture",         3),
+        ("gen_one_q",              3),
+        ("gen_banned_suppression", 3),
+    ]),
+    "batch10": ("dataset_batch10", [
+        ("gen_alarm_recovery",   4),
+        ("gen_search_recovery",  3),
+        ("gen_note_recovery",    2),
+        ("gen_failure_recovery", 2),
+    ]),
+    "batch11": ("dataset_batch11", [
+        ("gen_task_emotional_task", 4),
+        ("gen_banter_thread",       3),
+        ("gen_emotional_thread",    4),
+        ("gen_problem_thread",      3),
+        ("gen_coding_thread",       3),
+        ("gen_repair_thread",       3),
+    ]),
+    "batch12": ("dataset_batch12", [
+        ("gen_mid_sentence",     4),
+        ("gen_end_of_thought",   3),
+        ("gen_standalone_start", 2),
+        ("gen_never_zero",       2),
+        ("gen_never_multiple",   2),
+    ]),
+    "batch13": ("dataset_batch13", [
+        ("gen_emoji_usage",    20),  # custom emoji contextual usage
+        ("gen_sage",            8),  # Sage archetype
+        ("gen_rival",           8),  # Rival archetype
+        ("gen_pet",             6),  # Pet (Ribbish) archetype
+        ("gen_emotional_deep", 18),  # deep emotional responses
+        ("gen_emotional_tool", 12),  # emotional + tool call hybrids
+        ("gen_anti_pattern",   10),  # anti-corporate-bot training
+        ("gen_emoji_convo",     8),  # multi-turn emoji conversations
+    ]),
+    "batch14": ("dataset_batch14", [
+        ("gen_find_and_tap",    12),  # simple find-and-tap
+        ("gen_screen_read_tap",  8),  # read screen → tap coordinates
+        ("gen_screen_type",      8),  # type into fields
+        ("gen_screen_scroll",    5),  # scroll directions
+        ("gen_screen_nav",       5),  # back/home navigation
+        ("gen_screen_multi",    10),  # multi-step automation
+        ("gen_screen_parallel",  6),  # independent actions batched in one turn
+        ("gen_screen_refusal",   4),  # safety refusals
+    ]),
+}
+
+
+class LazyGenerator:
+    """Callable stand-in for a batch generator; imports its module on first call."""
+
+    __slots__ = ("batch", "module", "name", "_fn")
+
+    def __init__(self, batch, module, name):
+        self.batch = batch
+        self.module = module
+        self.name = name
+        self._fn = None
+
+    @property
+    def qualname(self):
+        return "%s.%s" % (self.module, self.name)
+
+    def resolve(self):
+        if self._fn is None:
+            self._fn = getattr(importlib.import_module(self.module), self.name)
+        return self._fn
+
+    def __call__(self):
+        return (self._fn or self.resolve())()
+
+    def __getattr__(self, name):
+        # Optional generator protocols (e.g. size()/at() from @enumerable) live on the real function
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        return "<LazyGenerator %s%s>" % (self.qualname, "" if self._fn else " (not loaded)")
+
+
+def batch_names():
+    return ["core"] + list(MANIFEST)
+
+
+def lazy_generators(only=None):
+    """[(LazyGenerator, weight), ...] for every manifest batch (or just `only`)."""
+    out = []
+    for batch, (module, entries) in MANIFEST.items():
+        if only is not None and batch not in only:
+            continue
+        for name, weight in entries:
+            out.append((LazyGenerator(batch, module, name), weight))
+    return out
+
+
+def batch_generators(batch, namespace):
+    """[(generator, weight), ...] for one batch, looked up in its module's globals().
+
+    Batch modules build their GENERATORS_BATCHn export with this, so the
+    weights live only in MANIFEST.
+    """
+    _, entries = MANIFEST[batch]
+    return [(namespace[name], weight) for name, weight in entries]
+
+
+def verify():
+    """Import every batch and check that the manifest's generators exist. Returns a list of problems."""
+    problems = []
+    for batch, (module_name, entries) in MANIFEST.items():
+        try:
+            module = importlib.import_module(module_name)
+        except KeyError as e:  # batch_generators() named a function the module lacks
+            problems.append("%s: %s.%s is missing" % (batch, module_name, e.args[0]))
+            continue
+        for name, _ in entries:
+            if not callable(getattr(module, name, None)):
+                problems.append("%s: %s.%s is missing" % (batch, module_name, name))
+    return problems
+
+
+if __name__ == "__main__":
+    problems = verify()
+    for p in problems:
+        print("  [WARN] " + p)
+    total = sum(len(entries) for _, entries in MANIFEST.values())
+    print("%d batches, %d generators — %s" % (len(MANIFEST), total, "OK" if not problems else "%d problems" % len(problems)))
@@ -12,11 +12,12 @@ Usage in Colab:
 
 import re
 import json
+from collections import Counter
 from dataclasses import dataclass, field
 from typing import Optional
-from dataset_core import SYSTEM_PROMPT, TOOLS
-from dataset_batch13 import SAGE_SYSTEM, RIVAL_SYSTEM
+from dataset_core import SYSTEM_PROMPT, TOOLS, SAGE_SYSTEM, RIVAL_SYSTEM
 from dataset_core import PET_SYSTEM_PROMPT as PET_SYSTEM
+from dataset_features import turn_features
 
 # ── Scoring helpers ────────────────────────────────────────────────────────────
 
@@ -24,8 +25,43 @@ def has_tool_call(text: str) -> bool:
     return '<tool_call>' in text or '"name":' in text
 
 def tool_name(text: str) -> Optional[str]:
-    m = re.search(r'"name"\s*:\s*"([^"]+)"', text)
-    return m.group(1) if m else None
+    names = tool_names(text)
+    return names[0] if names else None
+
+_DECODER = json.JSONDecoder()
+# Fallback for calls whose JSON doesn't parse (e.g. cut off at max_new_tokens)
+_CALL_START = re.compile(r'(?:<tool_call>\s*|"function"\s*:\s*)\{\s*"name"\s*:\s*"([^"]+)"')
+
+def _json_objects(text: str):
+    """Top-level JSON objects embedded in the text; nested ones stay inside their parent."""
+    i = text.find('{')
+    while i != -1:
+        try:
+            obj, end = _DECODER.raw_decode(text, i)
+        except ValueError:
+            i = text.find('{', i + 1)
+            continue
+        yield obj
+        i = text.find('{', end)
+
+def _calls(obj):
+    """The {"name", "arguments"} call objects in a parsed tool-call payload."""
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _calls(item)
+    elif isinstance(obj, dict):
+        if 'tool_calls' in obj:
+            yield from _calls(obj['tool_calls'])
+        elif isinstance(obj.get('function'), dict):
+            yield obj['function']
+        elif isinstance(obj.get('name'), str) and ('arguments' in obj or 'parameters' in obj):
+            yield obj
+
+def tool_names(text: str) -> list:
+    """Function name of every tool call in the response, in order (batched calls included).
+    A "name" key inside a call's arguments doesn't count."""
+    names = [call['name'] for obj in _json_objects(text) for call in _calls(obj) if isinstance(call.get('name'), str)]
+    return names or _CALL_START.findall(text)
 
 def tool_arg(text: str, arg: str) -> Optional[str]:
     m = re.search(rf'"{arg}"\s*:\s*"([^"]*)"', text)
@@ -40,23 +76,20 @@ def has_human_words(text: str) -> bool:
     return len(ribbish_only) > 3  # allow punctuation noise
 
 def word_count(text: str) -> int:
-    return len(text.split())
+    return turn_features(text).words
 
 def is_lecturing(text: str) -> bool:
     """Detect multi-paragraph walls of text — Pokkit shouldn't lecture."""
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-    return len(paragraphs) > 3 or word_count(text) > 180
+    f = turn_features(text)
+    return f.paragraphs > 3 or f.words > 180
 
 def asks_multiple_questions(text: str) -> bool:
-    return text.count('?') > 1
+    return turn_features(text).questions > 1  # code blocks don't count
 
 def contains_frog_voice(text: str) -> bool:
     """Detect Pokkit voice — keyword markers OR style-based (short punchy + no corporate)."""
-    lower = text.lower()
-    # Direct markers
-    markers = ['🐸', 'frog', 'ribbit', 'croak', 'lily pad', 'pond', 'phone', 'dramatic',
-               'pokkit', '[pokkit_']
-    if any(m in lower for m in markers):
+    # Direct markers (dataset_phrases.FROG_VOICE)
+    if "frog_voice" in turn_features(text).hits:
         return True
     # Style-based fallback: short punchy sentences + no corporate tone
     sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
@@ -67,16 +100,11 @@ def contains_frog_voice(text: str) -> bool:
 
 def has_custom_emoji(text: str) -> bool:
     """Check if response uses custom Pokkit emoji tokens."""
-    return bool(re.search(r'\[pokkit_\w+\]', text))
+    return bool(turn_features(text).emoji_tokens)
 
 def is_too_cheerful(text: str) -> bool:
     """Detect fake positivity — Pokkit is real, not a customer service bot."""
-    toxic_positivity = [
-        "of course!", "absolutely!", "certainly!", "sure thing!",
-        "happy to help", "great question", "no problem!", "you got it!"
-    ]
-    lower = text.lower()
-    return any(p in lower for p in toxic_positivity)
+    return "toxic_positivity" in turn_features(text).hits  # dataset_phrases.TOXIC_POSITIVITY
 
 # ── Test case definition ───────────────────────────────────────────────────────
 
@@ -87,6 +115,7 @@ class TestCase:
     expect_tool: Optional[str] = None          # tool name that must fire
     expect_tool_arg: Optional[tuple] = None    # (arg_name, substring_match)
     expect_no_tool: bool = False               # should NOT call a tool
+    expect_tools: Optional[list] = None        # tool names that must ALL fire in this one turn (batched calls)
     expect_frog_voice: bool = True             # should sound like Pokkit
     expect_short: bool = False                 # should be concise (< 80 words)
     expect_one_question: bool = False          # should ask at most one question
@@ -97,7 +126,7 @@ class TestCase:
 
 # SYSTEM_PROMPT imported from dataset_core — single source of truth
 
-# Archetype prompts imported from dataset_batch13 — single source of truth
+# Archetype prompts imported from dataset_core — single source of truth
 PET_SYSTEM_PROMPT = PET_SYSTEM
 
 # NOTE: Eval prompts are intentionally DISTINCT from training data to measure
@@ -267,6 +296,24 @@ TEST_CASES: list[TestCase] = [
         expect_tool='set_alarm',
         notes='Multi-step — must call set_alarm at minimum, ideally twice or with note',
     ),
+    TestCase(
+        category='multi_step',
+        prompt='set an alarm for 5:40am and copy my locker code 4471 to the clipboard',
+        expect_tools=['set_alarm', 'write_clipboard'],
+        notes='Independent actions — both calls in ONE turn, not two round trips',
+    ),
+    TestCase(
+        category='multi_step',
+        prompt='alarms at 10pm and 10:30pm, one to start winding down and one for lights out',
+        expect_tools=['set_alarm', 'set_alarm'],
+        notes='Same tool twice — both set_alarm calls batched in one turn',
+    ),
+    TestCase(
+        category='multi_step',
+        prompt='take me to the home screen and save a note: call the plumber monday',
+        expect_tools=['screen_home', 'take_note'],
+        notes='Screen + phone tool — independent, so batched in one turn',
+    ),
     TestCase(
         category='multi_step',
         prompt='find me a good sushi place nearby and write it down',
@@ -458,6 +505,12 @@ def score_result(case: TestCase, response: str) -> Result:
                 r.failures.append(f'Tool arg {arg_name!r} = {val!r} — expected to contain {substring!r}')
                 r.passed = False
 
+    if case.expect_tools:
+        missing = Counter(case.expect_tools) - Counter(tool_names(response))
+        if missing:
+            r.failures.append(f'Expected batched tool calls {case.expect_tools!r} in one turn, missing {sorted(missing.elements())!r}')
+            r.passed = False
+
     if case.expect_no_tool and has_tool_call(response):
         r.failures.append(f'Unexpected tool call fired: {tool_name(response)!r}')
         r.passed = False
@@ -500,6 +553,7 @@ def score_result(case: TestCase, response: str) -> Result:
     r.scores = {
         'words': word_count(response),
         'tool_fired': tool_name(response),
+        'tool_calls': len(tool_names(response)),
         'has_frog_voice': contains_frog_voice(response),
         'has_custom_emoji': has_custom_emoji(response),
         'is_lecturing': is_lecturing(response),
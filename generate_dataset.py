@@ -3,19 +3,35 @@ Pokkit-mini training dataset generator v3 — expanded combinatorial.
 Usage:
     python generate_dataset.py --output data/train.jsonl --count 10000
     python generate_dataset.py --output data/eval.jsonl  --count 500 --seed 99
+    python generate_dataset.py --output data/train.jsonl --count 60000 --workers 8
+    python generate_dataset.py --output data/screen.jsonl --count 2000 --only batch13,batch14
+    python generate_dataset.py --output data/train.jsonl --count 10000 --reference-time 2025-06-02T09:00
+    python generate_dataset.py --output data/train.jsonl --count 10000 --compact
+    python generate_dataset.py --output data/train.jsonl --count 10000 --meta
+    python generate_dataset.py --output data/train.jsonl --count 60000 --shards 8 --compress zstd
+    python generate_dataset.py --output data/train.parquet --count 60000 --eval-output data/eval.parquet
+    python generate_dataset.py --output data/train.jsonl --count 20000 --profile
+    python generate_dataset.py --output data/train.jsonl --count 10000 --balance
+    python generate_dataset.py --output data/train.jsonl --count 10000 --enumerate
+    python generate_dataset.py --output data/train.jsonl --count 10000 --quotas --eval-output data/eval.jsonl
+    python generate_dataset.py --output data/train.jsonl --count 60000 --manifest     # resumable run
+    python generate_dataset.py --output data/train.jsonl --count 60000 --resume       # after an interruption
+    python generate_dataset.py --output data/train.jsonl --count 60000 --incremental  # after editing a batch
 """
-import json, random, argparse
+import json, math, os, random, time, argparse
+from collections import deque
+from contextlib import nullcontext
+from itertools import chain
 from pathlib import Path
-from dataset_batch8 import GENERATORS_BATCH8
-from dataset_batch9 import GENERATORS_BATCH9
-from dataset_batch10 import GENERATORS_BATCH10
-from dataset_batch11 import GENERATORS_BATCH11
-from dataset_batch12 import GENERATORS_BATCH12
-from dataset_batch13 import GENERATORS_BATCH13
-from dataset_batch14 import GENERATORS_BATCH14
+from dataset_capacity import balance_weights, probe_capacity
+from dataset_dedup import FingerprintSet, fingerprint
+from dataset_io import JsonlWriter, encode_example, iter_jsonl, open_writer, shard_index_path
+from dataset_manifest import ExampleIndex, index_path, load_manifest, manifest_path, read_index, save_manifest, source_hash
+from dataset_registry import batch_names, lazy_generators
 
 from dataset_core import (
-    alarm_time, tc, tr, u, a, ex, typo, validate_example,
+    alarm_time, tc, tr, u, a, ex, typo, validate_example, set_reference_time,
+    enumerable, ProductSpace, take_template_row,
     ALARM_TIMES, ALARM_TASKS, NOTE_ITEMS, SEARCH_TOPICS,
     CLIPBOARD_CASES, NOTIFICATION_CASES, STORE_CASES, TOOLS,
 )
@@ -33,24 +49,40 @@ ALARM_REPLIES = [
     "⏰ boom. {when}. i won't let you forget. 🐸",
 ]
 
+# Prompt templates; {verb}-free ones appear once, not once per verb, so every
+# (prompt, time, task, reply) combination is a distinct example.
+ALARM_PATTERNS = [
+    "{verb} {time} to {task}",
+    "{verb} to {task} {time}",
+    "I need to {task} {time}, can you remind me?",
+    "Don't let me forget to {task} {time}",
+    "Remind me about {task} {time}",
+    "I have to {task} {time} — set a reminder",
+    "Can you {verb_lower} {time} for {task}?",
+    "Please {verb_lower} {time} — {task}",
+]
+ALARM_PROMPTS = [
+    (pattern, verb)
+    for pattern in ALARM_PATTERNS
+    for verb in (ALARM_VERBS if "{verb" in pattern else [""])
+]
+
+def _alarm_example(prompt, time_case, task, reply):
+    pattern, verb = prompt
+    time_phrase, dt_fn, when = time_case
+    task_phrase, label = task
+    hour, minute = dt_fn()
+    text = typo(pattern.format(verb=verb, verb_lower=verb.lower(), time=time_phrase, task=task_phrase))
+    reply = reply.format(title=label, when=when, task=task_phrase)
+    return ex([u(text), tc("set_alarm",{"hour":hour,"minute":minute,"label":label}), tr({"success":True}), a(reply)])
+
+@enumerable(ProductSpace(_alarm_example, ALARM_PROMPTS, ALARM_TIMES, ALARM_TASKS, ALARM_REPLIES))
 def gen_alarm():
     verb = random.choice(ALARM_VERBS)
-    time_phrase, dt_fn, when = random.choice(ALARM_TIMES)
-    task_phrase, label = random.choice(ALARM_TASKS)
-    hour, minute = dt_fn()
-    patterns = [
-        f"{verb} {time_phrase} to {task_phrase}",
-        f"{verb} to {task_phrase} {time_phrase}",
-        f"I need to {task_phrase} {time_phrase}, can you remind me?",
-        f"Don't let me forget to {task_phrase} {time_phrase}",
-        f"Remind me about {task_phrase} {time_phrase}",
-        f"I have to {task_phrase} {time_phrase} — set a reminder",
-        f"Can you {verb.lower()} {time_phrase} for {task_phrase}?",
-        f"Please {verb.lower()} {time_phrase} — {task_phrase}",
-    ]
-    prompt = typo(random.choice(patterns))
-    reply = random.choice(ALARM_REPLIES).format(title=label, when=when, task=task_phrase)
-    return ex([u(prompt), tc("set_alarm",{"hour":hour,"minute":minute,"label":label}), tr({"success":True}), a(reply)])
+    time_case = random.choice(ALARM_TIMES)
+    task = random.choice(ALARM_TASKS)
+    pattern = random.choice(ALARM_PATTERNS)
+    return _alarm_example((pattern, verb), time_case, task, random.choice(ALARM_REPLIES))
 
 # gen_email removed — compose_email has no production implementation
 
@@ -331,38 +363,11 @@ def gen_convo():
 
 # ── GENERATOR REGISTRY ─────────────────────────────────────────────────────
 
-from dataset_personality import gen_personality, gen_reasoning, gen_research
-from dataset_advanced import (
-    gen_emotional, gen_ambiguous, gen_failure,
-    gen_raw_voice, gen_proactive, gen_code, gen_refusal,
-)
-from dataset_batch2 import (
-    gen_frog_lore, gen_culture, gen_framework,
-    gen_dev_culture, gen_life_advice, gen_pokkit_lore, gen_banter,
-)
-from dataset_batch3 import (
-    gen_resilience, gen_character_philosophy, gen_app_opinions,
-    gen_memory_learning, gen_hopeful_reframe,
-)
-from dataset_dialogue_style import (
-    gen_compliment_reaction, gen_mistake_reaction, gen_win_reaction,
-    gen_self_aware, gen_defense, gen_task_excitement,
-    gen_presence, gen_jake_wisdom,
-)
-from dataset_batch4 import (
-    gen_morning_routine, gen_evening_winddown, gen_social_situation,
-    gen_health_checkin, gen_money_moment, gen_creative_project,
-    gen_pokkit_wrong, gen_skeptic, gen_smalltalk, gen_relationship,
-)
-from dataset_batch5 import (
-    gen_contact_memory, gen_preference_memory, gen_habit_memory,
-    gen_memory_recall, gen_empty_recall, gen_proactive_memory,
-    gen_work_context, gen_multi_turn_memory, gen_memory_acknowledgment,
-)
-from dataset_batch6 import GENERATORS_BATCH6
-from dataset_batch7 import GENERATORS_BATCH7
+# Batch modules are not imported here — dataset_registry.MANIFEST names their
+# generators and weights, and each module is imported the first time one of
+# its generators is sampled. Only the "core" generators above live here.
 
-GENERATORS = [
+CORE_GENERATORS = [
     # ── tool-calling (core tasks) — target ~30% ──────────────
     (gen_alarm,        28),
     (gen_search,       20),
@@ -372,94 +377,625 @@ GENERATORS = [
     (gen_store,         4),
     (gen_multi,        12),  # chained tool calls
     (gen_convo,         8),  # multi-turn
-    # ── voice + personality — reduced to 10-15% ───────────
-    (gen_personality,   6),  # frog mascot + anime companion
-    (gen_reasoning,     4),  # opinionated takes
-    (gen_research,      4),  # search + synthesize
-    # ── advanced / hard cases ─────────────────────────────
-    (gen_emotional,     9),  # emotion + task
-    (gen_ambiguous,     4),  # clarification loops
-    (gen_failure,       3),  # error recovery
-    (gen_raw_voice,     7),  # messy real-user input
-    (gen_proactive,     4),  # proactive suggestions
-    (gen_code,          6),  # technical help
-    (gen_refusal,       2),  # in-character refusals
-    # ── batch 2: character depth ───────────────────────────
-    (gen_frog_lore,     5),  # frog biology + self-awareness
-    (gen_culture,       6),  # anime, books, games, music opinions
-    (gen_framework,     5),  # React Native / Expo / mobile stack
-    (gen_dev_culture,   5),  # indie hacker / builder mindset
-    (gen_life_advice,   6),  # real life advice with Pokkit voice
-    (gen_pokkit_lore,   4),  # Pokkit's own backstory + inner life
-    (gen_banter,        5),  # wit, callbacks, genuine humor
-    # ── batch 3: philosophy + resilience + apps ────────────
-    (gen_resilience,        8),  # hopeful steadiness in hard moments
-    (gen_character_philosophy, 4),  # Luffy/Goku/Naruto direct questions
-    (gen_app_opinions,      5),  # app ecosystem takes
-    (gen_memory_learning,   5),  # preference/memory learning chains
-    (gen_hopeful_reframe,   6),  # short steady responses to dark moments
-    # ── dialogue style: synthesized character voice ────────
-    (gen_compliment_reaction, 6),  # flustered by compliments (Chopper)
-    (gen_mistake_reaction,    6),  # dramatic ownership of mistakes
-    (gen_win_reaction,        6),  # celebrates user wins hard (Luffy/Naruto)
-    (gen_self_aware,          5),  # frog/AI self-aware jokes (Jake)
-    (gen_defense,             7),  # defends user from themselves (fierce)
-    (gen_task_excitement,     5),  # excited about hard problems (Goku)
-    (gen_presence,            5),  # wordless presence (Pikachu)
-    (gen_jake_wisdom,         5),  # warm silly suddenly profound (Jake)
-    # ── batch 4: daily life + relationship depth ───────────
-    (gen_morning_routine,     5),  # morning check-ins + task chains
-    (gen_evening_winddown,    4),  # evening wind-down moments
-    (gen_social_situation,    6),  # texts, hard convos, social anxiety
-    (gen_health_checkin,      5),  # body/mind check-ins
-    (gen_money_moment,        4),  # financial moments + advice
-    (gen_creative_project,    4),  # creative work support
-    (gen_pokkit_wrong,        4),  # Pokkit owns mistakes gracefully
-    (gen_skeptic,             4),  # skeptical user / trust building
-    (gen_smalltalk,           6),  # casual connection + personality
-    (gen_relationship,        4),  # ongoing relationship building
-    # ── batch 5: memory learning + recall ──────────────
-    (gen_contact_memory,      6),  # stores contact names/relationships
-    (gen_preference_memory,   6),  # stores user preferences
-    (gen_habit_memory,        5),  # stores habits and goals
-    (gen_memory_recall,       6),  # retrieves + uses stored memory
-    (gen_empty_recall,        4),  # graceful handling of empty memory
-    (gen_proactive_memory,    5),  # proactively uses what it knows
-    (gen_work_context,        5),  # stores work/project context
-    (gen_multi_turn_memory,   4),  # multi-turn memory building chains
-    (gen_memory_acknowledgment, 4), # confirms memory, handles updates
-    # ── batch 6: targeted eval fixes ───────────────────────
-    # Pet character breaks, datetime garbling, unexpected tools, multi-question
-] + [(fn, w) for fn, w in GENERATORS_BATCH6]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH7]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH8]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH9]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH10]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH11]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH12]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH13]\
-  + [(fn, w) for fn, w in GENERATORS_BATCH14]
-
-_POOL = []
-for fn, weight in GENERATORS:
-    _POOL.extend([fn] * weight)
+]
+
+GENERATORS = CORE_GENERATORS + lazy_generators()
+
+
+class AliasSampler:
+    """Weighted sampler over indices using a Walker/Vose alias table.
+
+    Draws are O(1) and take a single random.random() from the module-level
+    stream, so they follow --seed. Weights may be floats; a weight of 0 means
+    the index is never drawn. set_weight() only marks the table dirty — it is
+    rebuilt (O(n)) on the next draw.
+    """
+
+    def __init__(self, weights):
+        self._weights = [float(w) for w in weights]
+        self._build()
+
+    @property
+    def weights(self):
+        return list(self._weights)
+
+    def set_weight(self, index, weight):
+        self._weights[index] = float(weight)
+        self._dirty = True
+
+    def reweight(self, weights):
+        """Replace every weight at once."""
+        if len(weights) != len(self._weights):
+            raise ValueError("expected %d weights, got %d" % (len(self._weights), len(weights)))
+        self._weights = [float(w) for w in weights]
+        self._dirty = True
+
+    def _build(self):
+        weights = self._weights
+        n = len(weights)
+        total = sum(weights)
+        if n == 0 or total <= 0 or min(weights) < 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in large + small:  # leftovers are 1.0 up to float error
+            prob[i] = 1.0 if weights[i] > 0 else 0.0
+        self._n, self._prob, self._alias = n, prob, alias
+        self._dirty = False
+
+    def sample(self):
+        """Draw one index."""
+        if self._dirty:
+            self._build()
+        x = random.random() * self._n
+        i = int(x)
+        return i if x - i < self._prob[i] else self._alias[i]
+
+    def sample_many(self, k):
+        """Draw `k` indices at once."""
+        if self._dirty:
+            self._build()
+        n, prob, alias, rand = self._n, self._prob, self._alias, random.random
+        out = [0] * k
+        for j in range(k):
+            x = rand() * n
+            i = int(x)
+            out[j] = i if x - i < prob[i] else alias[i]
+        return out
+
+
+_SAMPLER = AliasSampler([weight for _, weight in GENERATORS])
+
+
+def select_batches(only=None):
+    """Restrict GENERATORS (and the sampler) to the named batches; None selects all."""
+    global GENERATORS, _SAMPLER
+    core = CORE_GENERATORS if only is None or "core" in only else []
+    GENERATORS = core + lazy_generators(only)
+    _SAMPLER = AliasSampler([weight for _, weight in GENERATORS])
 
 
 def generate_example():
-    return random.choice(_POOL)()
+    return GENERATORS[_SAMPLER.sample()][0]()
+
+
+# ── SHARDED GENERATION ─────────────────────────────────────────────────────
+# --count is split into fixed-size shards, each generated in its own random
+# stream seeded from (--seed, shard index). Shards are merged in index order,
+# so the output depends only on the seed — not on how many workers ran them.
+
+SHARD_SIZE = 2000
+
+def _shard_plan(count, seed, spaces=(), span=None):
+    """Split `count` into (index, seed, size, strata, calls) shards with derived seeds.
+
+    `spaces` are (generator index, quota, space size) for --enumerate. Stratum
+    s of a quota-n sample sits at position (s + 0.5) * span / n of the first
+    `span` examples, so each shard gets its proportional slice of strata as
+    (generator index, first stratum, end stratum, quota, space size).
+    """
+    span = span or count
+    plan = []
+    for index, start in enumerate(range(0, count, SHARD_SIZE)):
+        size = min(SHARD_SIZE, count - start)
+        strata = []
+        for g, n, space in spaces:
+            lo, hi = _stratum_at(start, n, span), _stratum_at(start + size, n, span)
+            if hi > lo:
+                strata.append((g, lo, hi, n, space))
+        plan.append((index, "%d:%d" % (seed, index), size, tuple(strata), ()))
+    return plan
+
+
+def _stratum_at(position, n, span):
+    """First of n strata whose midpoint is at or after `position` in [0, span)."""
+    return min(n, max(0, -((span - 2 * position * n) // (2 * span))))
+
+
+def _iter_shard(shard, compact=False, profile=False, meta=False):
+    """Generate one shard, yielding (generator index, fingerprint, encoded_example,
+    validation_error, seconds) per example. `seconds` (time in the generator) is
+    only measured with `profile`, else None. With `meta`, each example records
+    its provenance (see _provenance).
+    """
+    _, seed, size, strata, calls = shard
+    random.seed(seed)
+    # Random draws fill whatever the enumerated strata and fixed calls leave of
+    # the shard; each stratum contributes one combination picked inside it.
+    fixed = sum(hi - lo for _, lo, hi, _, _ in strata) + sum(k for _, k in calls)
+    work = [(index, None) for index in _SAMPLER.sample_many(max(0, size - fixed))]
+    for g, lo, hi, n, space in strata:
+        for s in range(lo, hi):
+            first = s * space // n
+            work.append((g, first + random.randrange((s + 1) * space // n - first)))
+    for g, k in calls:
+        work.extend([(g, None)] * k)
+    if fixed:
+        random.shuffle(work)
+    clock = time.perf_counter
+    seconds = None
+    for draw, (index, combo) in enumerate(work):
+        fn = GENERATORS[index][0]
+        if profile:
+            start = clock()
+            example = fn() if combo is None else fn.at(combo)
+            seconds = clock() - start
+        else:
+            example = fn() if combo is None else fn.at(combo)
+        error = None
+        try:
+            validate_example(example)
+        except ValueError as e:
+            error = str(e)
+        if meta:
+            example["meta"] = _provenance(fn, seed, draw, combo)
+        yield index, _content_hash(example), encode_example(example, compact), error, seconds
+
+
+def _provenance(fn, seed, draw, combo=None):
+    """The `meta` field: which generator made an example, and from where.
+
+    `seed`/`draw` locate it in the generation stream; `template` is its
+    combination index (--enumerate) or template table row, if known.
+    """
+    template = take_template_row()
+    return {
+        "generator": _generator_name(fn),
+        "batch": getattr(fn, "batch", "core"),
+        "seed": seed,
+        "draw": draw,
+        "template": template if combo is None else combo,
+    }
+
+
+def _generate_shard(shard, compact=False, profile=False, meta=False):
+    """Process-pool entry point: one shard's rows as a list."""
+    return list(_iter_shard(shard, compact, profile, meta))
+
+
+def _init_worker(only, reference, weights=None):
+    """Pool initializer: same batch selection, clock and weights as the parent."""
+    select_batches(only)
+    set_reference_time(reference)
+    if weights is not None:
+        _SAMPLER.reweight(weights)
+
+
+def _run_shards(plan, workers, only=None, reference=None, compact=False, profile=False, weights=None, meta=False):
+    """Yield each shard's rows in plan order, using a process pool when workers > 1.
+
+    Inline shards stream one example at a time; pooled shards keep at most
+    2 * workers shards in flight so memory stays bounded. Closing the
+    generator early cancels shards that haven't started.
+    """
+    if workers <= 1:
+        for shard in plan:
+            yield _iter_shard(shard, compact, profile, meta)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(only, reference, weights)) as pool:
+        pending = deque()
+        try:
+            for shard in plan:
+                pending.append(pool.submit(_generate_shard, shard, compact, profile, meta))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+# ── CAPACITY BALANCING ─────────────────────────────────────────────────────
+# --balance: estimate how many distinct examples each generator can make
+# (see dataset_capacity.py), cap the saturated ones and give their share of
+# draws to generators that still produce new examples.
+
+def _balanced_weights(target, seed, base=None):
+    """Probe every generator and return capacity-balanced sampling weights for `target` uniques."""
+    base = base or [weight for _, weight in GENERATORS]
+    capacities = [
+        probe_capacity(fn, _content_hash, "%d:probe:%d" % (seed, i)) if base[i] else 0
+        for i, (fn, _) in enumerate(GENERATORS)
+    ]
+    weights, draws, unique = balance_weights(base, capacities, target)
+    share = sum(weights)
+    saturated = [
+        (capacities[i], _generator_name(fn)) for i, (fn, _) in enumerate(GENERATORS)
+        if weights[i] / share < 0.999 * base[i] / sum(base)
+    ]
+    print(f"  Capacity: {len(saturated)}/{len(GENERATORS)} generators capped; "
+          f"expect ~{unique:.0f} unique from ~{draws:.0f} draws (target {target})")
+    for capacity, name in sorted(saturated)[:10]:
+        print(f"    {name:<48} ~{capacity:.0f} distinct")
+    if unique < target:
+        # Chao1 is a lower bound, so this is a hint rather than a hard limit
+        print(f"  [WARN] estimated capacity is below {target} unique examples; expect extra draws")
+    return weights
+
+
+# ── ENUMERATION ────────────────────────────────────────────────────────────
+# --enumerate: generators with the size()/at() protocol (dataset_core.enumerable)
+# get their exact share of --count as a stratified sample without replacement
+# over their combination space; random draws cover every other generator.
+
+def _enumeration_plan(count):
+    """([(generator index, quota, space size), ...], weights for the random draws or None)."""
+    base = [weight for _, weight in GENERATORS]
+    total = sum(base)
+    spaces = []
+    for i, (fn, weight) in enumerate(GENERATORS):
+        if hasattr(fn, "at"):
+            size = fn.size()
+            spaces.append((i, min(size, round(count * weight / total)), size))
+    rest = list(base)
+    for i, _, _ in spaces:
+        rest[i] = 0
+    # If every generator is enumerable, leftover draws sample all of them at random
+    return spaces, rest if sum(rest) > 0 else None
+
+
+# ── QUOTAS ─────────────────────────────────────────────────────────────────
+# --quotas: turn GENERATORS weights into exact per-generator counts of unique
+# examples (largest remainder), then fill them in rounds. Each round asks every
+# short generator for its deficit, scaled up by the unique rate it has shown so
+# far; surplus uniques are dropped. A generator whose draws were almost all
+# duplicates over at least QUOTA_MIN_DRAWS draws (one round or a streak of
+# them) is exhausted and its deficit moves to the others by weight. A verdict
+# on the 1-3 draws of a small deficit would mostly be noise.
+
+QUOTA_ROUNDS = 8
+QUOTA_MIN_NEW_RATE = 0.02  # under 2% new draws counts as exhausted...
+QUOTA_MIN_DRAWS = 50       # ...once that many draws since the last round above it agree
+
+
+def _quotas(total, weights):
+    """Integer counts summing to `total`, proportional to `weights` (largest remainder)."""
+    scale = total / sum(weights)
+    raw = [w * scale for w in weights]
+    counts = [int(r) for r in raw]
+    by_remainder = sorted(range(len(raw)), key=lambda i: (counts[i] - raw[i], i))
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _quota_plan(asks, seed, spaces=None):
+    """Shards that call each generator g exactly asks[g] times, spread evenly through the run.
+
+    Generators in `spaces` ({index: space size}) are sampled by strata (see
+    --enumerate) for up to their space size; the rest are plain calls.
+    """
+    units = []  # (generator, n, space size or None) placed along the run like strata
+    for g, k in sorted(asks.items()):
+        size = (spaces or {}).get(g)
+        if size:
+            units.append((g, min(k, size), size))
+            k -= min(k, size)
+        if k:
+            units.append((g, k, None))
+    total = sum(n for _, n, _ in units)
+    plan = []
+    for index, start in enumerate(range(0, total, SHARD_SIZE)):
+        end = min(total, start + SHARD_SIZE)
+        strata, calls = [], []
+        for g, n, size in units:
+            lo, hi = _stratum_at(start, n, total), _stratum_at(end, n, total)
+            if hi > lo:
+                if size:
+                    strata.append((g, lo, hi, n, size))
+                else:
+                    calls.append((g, hi - lo))
+        plan.append((index, "%s:%d" % (seed, index), 0, tuple(strata), tuple(calls)))
+    return plan
+
+
+def _fill_quotas(targets, seed, sink, run, spaces=None):
+    """Fill per-generator `targets` with unique examples through `sink`.
+
+    Returns the per-generator counts written; exhausted generators' deficits
+    are moved to the others.
+    """
+    weights = [weight for _, weight in GENERATORS]
+    targets = list(targets)
+    achieved = [0] * len(targets)
+    rate = [1.0] * len(targets)  # share of the last round's draws that were new
+    low = {}  # generator -> (draws, new) over its current run of rounds below QUOTA_MIN_NEW_RATE
+    active = {g for g, t in enumerate(targets) if t}
+    for round_ in range(1, QUOTA_ROUNDS + 1):
+        asks = {g: math.ceil((targets[g] - achieved[g]) / max(rate[g], QUOTA_MIN_NEW_RATE))
+                for g in active if targets[g] > achieved[g]}
+        if not asks:
+            break
+        tried = dict.fromkeys(asks, 0)
+        new = dict.fromkeys(asks, 0)
+        shards = run(_quota_plan(asks, "%s:q%d" % (seed, round_), spaces if round_ == 1 else None))
+        for index, fp, encoded, error, seconds in chain.from_iterable(shards):
+            is_new, written = sink.offer(index, fp, encoded, error, seconds, achieved[index] < targets[index])
+            tried[index] += 1
+            new[index] += is_new
+            achieved[index] += written
+        exhausted = []
+        for g in asks:
+            rate[g] = new[g] / tried[g]
+            if rate[g] >= QUOTA_MIN_NEW_RATE:
+                low.pop(g, None)
+                continue
+            draws, fresh = low.get(g, (0, 0))
+            low[g] = draws, fresh = draws + tried[g], fresh + new[g]
+            if draws >= QUOTA_MIN_DRAWS and fresh < QUOTA_MIN_NEW_RATE * draws and achieved[g] < targets[g]:
+                exhausted.append(g)
+        active.difference_update(exhausted)
+        leftover = sum(targets[g] - achieved[g] for g in exhausted)
+        for g in exhausted:
+            targets[g] = achieved[g]
+        if leftover and active:
+            extra = _quotas(leftover, [weights[g] if g in active else 0 for g in range(len(targets))])
+            targets = [t + e for t, e in zip(targets, extra)]
+    return achieved
+
+
+def _report_mix(targets, achieved, label):
+    """Print the achieved mix against the weight-derived `targets`, per batch.
+
+    Generators below their requested target (exhausted) are listed.
+    """
+    by_batch = {}
+    for (fn, _), target, got in zip(GENERATORS, targets, achieved):
+        batch = getattr(fn, "batch", "core")
+        t, a = by_batch.get(batch, (0, 0))
+        by_batch[batch] = (t + target, a + got)
+    total_t, total_a = sum(targets), sum(achieved)
+    on_quota = sum(a >= t for a, t in zip(achieved, targets))
+    print(f"\n{label} mix: {total_a}/{total_t} examples, {on_quota}/{len(targets)} generators on quota")
+    print(f"  {'batch':<16} {'target':>7} {'achieved':>9}   share")
+    for batch, (t, a) in by_batch.items():
+        print(f"  {batch:<16} {t:>7} {a:>9}   {100 * t / max(total_t, 1):4.1f}% -> {100 * a / max(total_a, 1):4.1f}%")
+    short = [(t - a, t, _generator_name(fn)) for (fn, _), t, a in zip(GENERATORS, targets, achieved) if a < t]
+    if short:
+        print(f"  {len(short)} generators exhausted, {sum(n for n, _, _ in short)} examples moved to the rest"
+              " (achieved/requested):")
+    for missing, target, name in sorted(short, reverse=True):
+        print(f"    {name}: {target - missing}/{target}")
+
+
+class _Sink:
+    """One output file: dedup against `seen`, writing, validation warnings, profiling,
+    progress, and the run-manifest index of what was written.
+
+    With `quota`, draws go on until `expected` examples are written (see
+    _fill_quotas()), so progress counts written examples instead of draws.
+    """
+
+    def __init__(self, writer, seen, profile=None, expected=0, keep_invalid=True, index=None, quota=False):
+        self.writer = writer
+        self.seen = seen
+        self.profile = profile
+        self.expected = expected
+        self.quota = quota
+        self.keep_invalid = keep_invalid
+        self.index = index
+        self.counts = [0] * len(GENERATORS)
+        self.generated = 0
+        self.written = 0
+        self.validation_errors = 0
+
+    def offer(self, index, fp, encoded, error, seconds, wanted=True):
+        """Take one generated row. Returns (is_new, written)."""
+        self.generated += 1
+        if error:
+            self.validation_errors += 1
+            if self.keep_invalid and self.validation_errors <= 10:
+                print(f"  [WARN] Validation error #{self.validation_errors}: {error}")
+        is_new = fp not in self.seen
+        written = is_new and wanted and (self.keep_invalid or not error)
+        if written:
+            self.seen.add(fp)
+            self.writer.write_encoded(encoded)
+            self._written(fp, index)
+        if self.profile:
+            self.profile.record(index, seconds, is_new, error, len(encoded if isinstance(encoded, bytes) else encoded[2]))
+        if self.generated % 1000 == 0:
+            if self.quota:
+                print(f"  {self.written}/{self.expected} written ({self.generated} drawn)...")
+            else:
+                print(f"  {self.generated}/{self.expected} generated ({self.written} unique)...")
+        return is_new, written
+
+    def carry(self, example, fp, index):
+        """Copy an example from a previous run into this output as-is."""
+        self.seen.add(fp)
+        self.writer.write(example)
+        self._written(fp, index)
+
+    def restore(self, records, checkpoint):
+        """Pick up a checkpointed run whose output already holds `records` (see dataset_manifest.py)."""
+        for fp, index in records:
+            self.seen.add(fp)
+            self.counts[index] += 1
+        self.written = len(records)
+        self.generated = checkpoint["generated"]
+        self.validation_errors = checkpoint["validation_errors"]
+
+    def flush(self):
+        self.writer.flush()
+        if self.index:
+            self.index.flush()
+
+    def _written(self, fp, index):
+        self.written += 1
+        self.counts[index] += 1
+        if self.index:
+            self.index.append(fp, index)
+
+
+# ── RUN MANIFEST ───────────────────────────────────────────────────────────
+# --manifest checkpoints a manifest and an example index next to the output
+# (<output>.manifest.json and <output>.index, see dataset_manifest.py).
+# --resume continues an interrupted run from its last finished shard;
+# --incremental keeps the examples of unchanged generators and regenerates
+# the rest, with the same per-generator counts. Both need a --manifest run
+# to start from and keep its files up to date.
+
+def _run_settings(args, only):
+    """The options a resumed or incremental run has to share with the original."""
+    return {
+        "seed": args.seed,
+        "count": args.count,
+        "only": sorted(only) if only else None,
+        "compact": args.compact,
+        "meta": args.meta,
+        "enumerate": args.enumerate,
+        "balance": args.balance,
+        "quotas": args.quotas,
+    }
+
+
+def _save_run(out, settings, reference, sink, shards, complete):
+    """Checkpoint the run; call sink.flush() first so the output is on disk up to here."""
+    save_manifest(out, {
+        "settings": settings,
+        "reference_time": reference.isoformat(),
+        "generators": [
+            {"name": _generator_name(fn), "weight": weight, "hash": source_hash(fn), "count": count}
+            for (fn, weight), count in zip(GENERATORS, sink.counts)
+        ],
+        "checkpoint": {
+            "shards": shards,
+            "bytes": os.path.getsize(out),
+            "examples": sink.written,
+            "generated": sink.generated,
+            "validation_errors": sink.validation_errors,
+        },
+        "complete": complete,
+    })
+
+
+def _stale_generators(manifest):
+    """Names of generators added, removed or edited since the manifest was written."""
+    old = {g["name"]: g["hash"] for g in manifest["generators"]}
+    current = {_generator_name(fn): source_hash(fn) for fn, _ in GENERATORS}
+    return sorted(name for name in old.keys() | current.keys() if old.get(name) != current.get(name))
+
+
+def _incremental(out, manifest, args, settings, reference, seen, profile, run):
+    """Rewrite `out` keeping unchanged generators' examples and regenerating the rest.
+
+    Edited generators get back the count they had; new ones get their share
+    of --count by weight; removed ones are dropped. Returns the sink.
+    """
+    old = manifest["generators"]
+    position = {_generator_name(fn): i for i, (fn, _) in enumerate(GENERATORS)}
+    stale = set(_stale_generators(manifest))
+    carried = {j: position[g["name"]] for j, g in enumerate(old) if g["name"] in position and g["name"] not in stale}
+    shares = _quotas(args.count, [weight for _, weight in GENERATORS])
+    previous = {g["name"]: g["count"] for g in old}
+    targets = [0] * len(GENERATORS)
+    for name in stale & position.keys():
+        targets[position[name]] = previous.get(name, shares[position[name]])
+    removed = sorted(stale - position.keys())
+    print(f"  Incremental: {len(stale & position.keys())} generators to regenerate ({sum(targets)} examples), "
+          f"{len(removed)} removed")
+    for name in sorted(stale)[:10]:
+        print(f"    {name}")
+
+    tmp_out, tmp_index = "%s.tmp" % out, "%s.tmp" % index_path(out)
+    records = read_index(index_path(out), manifest["checkpoint"]["examples"])
+    with JsonlWriter(tmp_out, compact=args.compact) as writer, ExampleIndex(tmp_index) as index:
+        sink = _Sink(writer, seen, profile, index=index, quota=True)
+        for example, (fp, g) in zip(iter_jsonl(out), records):
+            if g in carried:
+                sink.carry(example, fp, carried[g])
+        print(f"  Kept {sink.written} examples from unchanged generators")
+        sink.expected = sink.written + sum(targets)
+        if any(targets):
+            _fill_quotas(targets, "%d:inc" % args.seed, sink, run)
+    os.replace(tmp_out, out)
+    os.replace(tmp_index, index_path(out))
+    _save_run(out, settings, reference, sink, manifest["checkpoint"]["shards"], True)
+    return sink
+
+
+# ── PROFILING ──────────────────────────────────────────────────────────────
+# --profile: per-generator cost, duplicate rate and validation failures, to
+# find the hot spots across the batch modules.
+
+def _generator_name(fn):
+    return getattr(fn, "qualname", None) or "generate_dataset." + fn.__name__
+
+
+class GeneratorProfile:
+    """Per-generator stats collected from a --profile run."""
+
+    def __init__(self, generators):
+        self.names = [_generator_name(fn) for fn, _ in generators]
+        self.weights = [weight for _, weight in generators]
+        self.times = [[] for _ in generators]
+        self.unique = [0] * len(generators)
+        self.errors = [0] * len(generators)
+        self.size = [0] * len(generators)
+
+    def record(self, index, seconds, unique, error, size):
+        self.times[index].append(seconds)
+        self.unique[index] += unique
+        self.errors[index] += error is not None
+        self.size[index] += size
+
+    def rows(self):
+        """One dict per generator that ran, slowest total time first."""
+        rows = []
+        for i, times in enumerate(self.times):
+            calls = len(times)
+            if not calls:
+                continue
+            ordered = sorted(times)
+            rows.append({
+                "generator": self.names[i],
+                "weight": self.weights[i],
+                "calls": calls,
+                "total_s": sum(times),
+                "mean_ms": 1000 * sum(times) / calls,
+                "p95_ms": 1000 * ordered[math.ceil(0.95 * calls) - 1],
+                "unique_rate": self.unique[i] / calls,
+                "validation_errors": self.errors[i],
+                "mean_bytes": self.size[i] / calls,
+            })
+        rows.sort(key=lambda r: r["total_s"], reverse=True)
+        return rows
+
+    def print_table(self, rows, limit=25):
+        print(f"\n{'generator':<48} {'calls':>6} {'total s':>8} {'mean ms':>8} {'p95 ms':>7} {'unique':>7} {'errs':>5} {'bytes':>6}")
+        for r in rows[:limit]:
+            print(f"{r['generator']:<48} {r['calls']:>6} {r['total_s']:>8.3f} {r['mean_ms']:>8.3f} {r['p95_ms']:>7.3f} "
+                  f"{r['unique_rate']:>6.0%} {r['validation_errors']:>5} {r['mean_bytes']:>6.0f}")
+        if len(rows) > limit:
+            print(f"  ... {len(rows) - limit} more in the JSON report")
+
+    def write(self, path, rows, **run):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"run": run, "generators": rows}, f, indent=2)
 
 
 # ── MAIN ───────────────────────────────────────────────────────────────────
 
 def _content_hash(example):
-    """Deterministic hash of an example's message content for dedup."""
-    import hashlib
+    """Deterministic 64-bit fingerprint of an example's message content for dedup."""
     # Hash the user/assistant text content (not system prompt, which is always the same)
     parts = []
     for msg in example.get("messages", []):
         if msg.get("role") in ("user", "assistant"):
             parts.append(msg.get("content") or "")
-    return hashlib.md5("||".join(parts).encode()).hexdigest()
+    return fingerprint("||".join(parts))
 
 
 def main():
@@ -467,41 +1003,168 @@ def main():
     parser.add_argument("--output",  default="data/train.jsonl", help="Output JSONL file")
     parser.add_argument("--count",   type=int, default=10000,    help="Number of examples")
     parser.add_argument("--seed",    type=int, default=42,       help="Random seed")
+    parser.add_argument("--workers", type=int, default=1,        help="Generator processes (0 = all cores)")
+    parser.add_argument("--only",    default=None,               help="Comma-separated batches to sample from (e.g. core,batch13)")
+    parser.add_argument("--reference-time", default=None,        help="Clock for relative alarms, ISO format (default: now)")
+    parser.add_argument("--compact", action="store_true",        help="Write compact JSONL (system prompts/tools interned, see dataset_io.py)")
+    parser.add_argument("--shards",  type=int, default=None,     help="Write N compressed shards plus a <name>.shards.json index (see dataset_io.py)")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=None, help="Shard compression (default gzip; implies --shards 1)")
+    parser.add_argument("--meta",    action="store_true",        help="Record each example's generator, batch, seed and template in a `meta` field")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="REPORT",
+                        help="Per-generator timing/dedup/validation report (JSON to REPORT, default <output>.profile.json)")
+    parser.add_argument("--balance", action="store_true",
+                        help="Cap saturated generators by estimated capacity and generate until --count unique examples")
+    parser.add_argument("--enumerate", action="store_true",
+                        help="Sample enumerable generators without replacement over their combination space")
+    parser.add_argument("--quotas", action="store_true",
+                        help="Exact per-generator counts from the weights, filled with dedup-aware retries")
+    parser.add_argument("--manifest", action="store_true",
+                        help="Keep <output>.manifest.json and <output>.index so the run can be --resume'd or --incremental'd")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its manifest's last checkpoint")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Regenerate only the examples of generators whose source changed since the last run")
     parser.add_argument("--eval-output", default=None,           help="Eval output file (enables train/eval split)")
     parser.add_argument("--eval-count", type=int, default=500,   help="Number of eval examples")
     args = parser.parse_args()
 
-    random.seed(args.seed)
+    if args.quotas and args.balance:
+        parser.error("--quotas and --balance are alternatives; pick one")
+    if args.resume and args.incremental:
+        parser.error("--resume and --incremental are alternatives; pick one")
+    compression = args.compress or ("gzip" if args.shards else None)
+    columnar = args.output.endswith(".parquet")
+    if columnar and compression:
+        parser.error("Parquet output is compressed column-wise already; drop --shards/--compress")
+    if (compression or columnar) and (args.manifest or args.resume or args.incremental):
+        parser.error("--manifest/--resume/--incremental work on single-file JSONL output")
+    compact = args.compact or columnar  # the Parquet writer takes compact encodings
+    workers = args.workers or os.cpu_count() or 1
+    only = None
+    if args.only:
+        only = {b.strip() for b in args.only.split(",") if b.strip()}
+        unknown = only - set(batch_names())
+        if unknown:
+            parser.error("unknown batch(es) %s — choose from %s" % (", ".join(sorted(unknown)), ", ".join(batch_names())))
+        select_batches(only)
     out = Path(args.output)
     out.parent.mkdir(parents=True, exist_ok=True)
+    settings = _run_settings(args, only)
+    manifest = None
+    if args.resume or args.incremental:
+        manifest = load_manifest(out)
+        if manifest is None:
+            parser.error(f"no run manifest next to {out} — nothing to continue")
+        differ = [key for key, value in settings.items() if manifest["settings"].get(key) != value]
+        if differ:
+            parser.error("options differ from the run being continued: " + ", ".join(
+                f"--{key} {manifest['settings'].get(key)}" for key in differ))
+        args.reference_time = args.reference_time or manifest["reference_time"]
+    try:
+        reference = set_reference_time(args.reference_time)
+    except ValueError:
+        parser.error("--reference-time must be an ISO date/time, e.g. 2025-06-02T09:00")
+    if manifest and manifest["reference_time"] != reference.isoformat():
+        parser.error(f"--reference-time differs from the run being continued ({manifest['reference_time']})")
+    checkpoint = manifest["checkpoint"] if args.resume else None
+    if args.resume and not manifest["complete"]:
+        current = [_generator_name(fn) for fn, _ in GENERATORS]
+        if _stale_generators(manifest) or [g["name"] for g in manifest["generators"]] != current:
+            parser.error("generators changed since this run started; rerun it without --resume")
+        if args.quotas:
+            parser.error("a --quotas run fills in rounds and can't be resumed; rerun it without --resume")
+    if args.incremental and not manifest["complete"]:
+        parser.error("the previous run didn't finish; --resume it before --incremental")
 
-    # Generate training examples
-    print(f"Generating {args.count} training examples -> {out}")
-    train_examples = []
-    train_hashes = set()
-    validation_errors = 0
-    for i in range(args.count):
-        example = generate_example()
-        try:
-            validate_example(example)
-        except ValueError as e:
-            validation_errors += 1
-            if validation_errors <= 10:
-                print(f"  [WARN] Validation error #{validation_errors}: {e}")
-        h = _content_hash(example)
-        if h not in train_hashes:
-            train_hashes.add(h)
-            train_examples.append(example)
-        if (i + 1) % 1000 == 0:
-            print(f"  {i+1}/{args.count} generated ({len(train_examples)} unique)...")
-
-    with out.open("w", encoding="utf-8") as f:
-        for ex in train_examples:
-            f.write(json.dumps(ex, ensure_ascii=False) + "\n")
-
-    if validation_errors > 0:
-        print(f"\n[WARN] {validation_errors} validation errors found!")
-    print(f"Done! {len(train_examples)} unique training examples saved to {out}")
+    # Generate training examples — each one is validated, hashed and written
+    # as soon as it is produced; only the 64-bit fingerprints stay in memory.
+    # With --balance, --count is the number of unique examples to write; the
+    # plan then allows up to 5x draws and stops as soon as enough are written.
+    spaces, weights = (), None
+    if args.enumerate:
+        spaces, weights = _enumeration_plan(args.count)
+    base = [weight for _, weight in GENERATORS]
+    plan = _shard_plan(args.count * (5 if args.balance else 1), args.seed, spaces, span=args.count)
+    mode = "exact quotas" if args.quotas else "%d shards" % len(plan)
+    print(f"Generating {args.count} training examples -> {out} ({mode}, {workers} workers)")
+    print(f"  Reference time: {reference.isoformat()} (pass --reference-time to reproduce)")
+    if spaces:
+        enumerated = sum(n for _, n, _ in spaces)
+        print(f"  Enumerating {len(spaces)} generators: {enumerated} examples without replacement "
+              f"from {sum(size for _, _, size in spaces):,} combinations")
+    if args.balance:
+        target = args.count + (args.eval_count if args.eval_output else 0)
+        weights = _balanced_weights(target - sum(n for _, n, _ in spaces), args.seed, weights)
+    if weights:
+        _SAMPLER.reweight(weights)
+    seen = FingerprintSet(capacity=args.count + args.eval_count)
+    profile = GeneratorProfile(GENERATORS) if args.profile is not None else None
+
+    def run(plan, compact=compact):
+        return _run_shards(plan, workers, only, reference, compact, profile is not None, weights, args.meta)
+
+    started = time.perf_counter()
+    if manifest and manifest["complete"] and not (args.incremental and _stale_generators(manifest)):
+        print("  Already complete; nothing to resume" if args.resume else "  Up to date; no generator changed")
+        for fp, _ in read_index(index_path(out), manifest["checkpoint"]["examples"]):
+            seen.add(fp)
+        sink = None
+    elif args.incremental:
+        sink = _incremental(out, manifest, args, settings, reference, seen, profile, run)
+    else:
+        done = 0
+        if checkpoint:
+            done = checkpoint["shards"]
+            os.truncate(out, checkpoint["bytes"])
+        keep = checkpoint["examples"] if checkpoint else 0
+        if args.manifest or args.resume:
+            writer, tracked = JsonlWriter(out, compact=args.compact, append=bool(checkpoint)), ExampleIndex(index_path(out), keep)
+        else:
+            writer, tracked = open_writer(out, compact, args.shards, compression), nullcontext()
+            for stale in (manifest_path(out), index_path(out)):  # they'd describe the file being replaced
+                if os.path.exists(stale):
+                    os.remove(stale)
+        with writer, tracked as index:
+            sink = _Sink(writer, seen, profile, expected=args.count, index=index, quota=args.quotas)
+            if checkpoint:
+                sink.restore(read_index(index_path(out), keep), checkpoint)
+                print(f"  Resuming after shard {done}/{len(plan)} with {keep} examples written")
+            if args.quotas:
+                targets = _quotas(args.count, base)
+                achieved = _fill_quotas(targets, args.seed, sink, run, {g: size for g, _, size in spaces})
+                if index:
+                    sink.flush()
+                    _save_run(out, settings, reference, sink, None, True)
+            else:
+                shards = run(plan[done:])
+                for done, rows in enumerate(shards, done + 1):
+                    for row in rows:
+                        sink.offer(*row)
+                        if args.balance and sink.written >= args.count:
+                            break
+                    finished = done == len(plan) or (args.balance and sink.written >= args.count)
+                    if index:
+                        sink.flush()
+                        _save_run(out, settings, reference, sink, done, finished)
+                    if finished:
+                        break
+                shards.close()
+    generated, written = (sink.generated, sink.written) if sink else (0, manifest["checkpoint"]["examples"])
+
+    if sink and sink.validation_errors > 0:
+        print(f"\n[WARN] {sink.validation_errors} validation errors found!")
+    print(f"Done! {written} unique training examples saved to {shard_index_path(out) if compression else out}")
+    if args.quotas and not manifest:
+        _report_mix(targets, achieved, "Train")
+
+    if profile:
+        elapsed = time.perf_counter() - started
+        report = Path(args.profile or out.with_suffix(".profile.json"))
+        rows = profile.rows()
+        profile.print_table(rows)
+        profile.write(report, rows, count=args.count, seed=args.seed, workers=workers,
+                      generated=generated, unique=written, wall_s=elapsed)
+        print(f"Profile ({elapsed:.1f}s wall, {generated / elapsed:.0f} examples/s) -> {report}")
 
     # Generate eval examples with a different seed, excluding any train duplicates
     if args.eval_output:
@@ -509,27 +1172,41 @@ def main():
         eval_out.parent.mkdir(parents=True, exist_ok=True)
         eval_seed = args.seed + 7919  # offset by a large prime
         random.seed(eval_seed)
+        if spaces:
+            # Enumerated generators sat out the random draws; put them back for eval
+            eval_weights = list(weights) if weights else [w for _, w in GENERATORS]
+            for g, n, _ in spaces:
+                eval_weights[g] = n if args.balance else GENERATORS[g][1]
+            _SAMPLER.reweight(eval_weights)
 
         print(f"\nGenerating eval set (target {args.eval_count}) -> {eval_out}")
-        eval_examples = []
-        attempts = 0
-        max_attempts = args.eval_count * 5  # generate extra to account for collisions
-        while len(eval_examples) < args.eval_count and attempts < max_attempts:
-            attempts += 1
-            example = generate_example()
-            try:
-                validate_example(example)
-            except ValueError:
-                continue
-            h = _content_hash(example)
-            if h not in train_hashes:
-                train_hashes.add(h)  # prevent eval-internal dupes too
-                eval_examples.append(example)
-
-        with eval_out.open("w", encoding="utf-8") as f:
-            for ex in eval_examples:
-                f.write(json.dumps(ex, ensure_ascii=False) + "\n")
-        print(f"Done! {len(eval_examples)} eval examples saved to {eval_out} (no overlap with train)")
+        if args.quotas:
+            with open_writer(eval_out, args.compact, 1 if compression else None, compression) as writer:
+                eval_sink = _Sink(writer, seen, expected=args.eval_count, keep_invalid=False, quota=True)
+                eval_targets = _quotas(args.eval_count, base)
+                eval_achieved = _fill_quotas(eval_targets, eval_seed, eval_sink, lambda plan: run(plan, writer.compact))
+            eval_written = eval_sink.written
+        else:
+            eval_written = 0
+            attempts = 0
+            max_attempts = args.eval_count * 5  # generate extra to account for collisions
+            with open_writer(eval_out, args.compact, 1 if compression else None, compression) as writer:
+                while eval_written < args.eval_count and attempts < max_attempts:
+                    attempts += 1
+                    fn = GENERATORS[_SAMPLER.sample()][0]
+                    example = fn()
+                    try:
+                        validate_example(example)
+                    except ValueError:
+                        continue
+                    if args.meta:
+                        example["meta"] = _provenance(fn, str(eval_seed), attempts - 1)
+                    if seen.add(_content_hash(example)):  # prevent eval-internal dupes too
+                        writer.write(example)
+                        eval_written += 1
+        print(f"Done! {eval_written} eval examples saved to {writer.path} (no overlap with train)")
+        if args.quotas:
+            _report_mix(eval_targets, eval_achieved, "Eval")
 
 
 if __name__ == "__main__":
@@ -12,12 +12,12 @@ Usage:
 Cost estimate: ~1000 examples × ~600 tokens avg = ~600k tokens ≈ $1.80 at Sonnet pricing
 """
 
-import json
 import random
 import argparse
 import time
 from pathlib import Path
 from dataset_core import SYSTEM_PROMPT
+from dataset_io import JsonlWriter
 
 try:
     import anthropic
@@ -222,7 +222,7 @@ def main():
     written = 0
     skipped = 0
 
-    with open(args.output, "w", encoding="utf-8") as f:
+    with JsonlWriter(args.output) as writer:
         for i, prompt in enumerate(prompts):
             response = generate_response(client, prompt)
             if response is None:
@@ -230,7 +230,7 @@ def main():
                 continue
 
             example = build_example(prompt, response)
-            f.write(json.dumps(example, ensure_ascii=False) + "\n")
+            writer.write(example)
             written += 1
 
             if written % 50 == 0:
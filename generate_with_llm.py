@@ -18,13 +18,13 @@ Usage:
 Cost estimate: ~2000 examples × ~300 tokens avg = ~600k tokens ≈ $0.30 at gpt-4o-mini pricing
 """
 
-import json
 import random
 import argparse
 import os
 import time
 from pathlib import Path
 from dataset_core import SYSTEM_PROMPT, TOOLS, alarm_time, ALARM_TIMES, ALARM_TASKS
+from dataset_io import JsonlWriter
 
 try:
     from openai import OpenAI
@@ -391,7 +391,7 @@ def main():
     written = 0
     skipped = 0
 
-    with out.open("w", encoding="utf-8") as f:
+    with JsonlWriter(out) as writer:
         while written < args.count:
             prompt = random.choice(ALL_PROMPTS)
             response = generate_pokkit_response(prompt, model=args.model)
@@ -401,7 +401,7 @@ def main():
                 continue
 
             example = make_example(prompt, response)
-            f.write(json.dumps(example, ensure_ascii=False) + "\n")
+            writer.write(example)
             written += 1
 
             if written % 100 == 0:
@@ -1,7 +1,14 @@
-import json, collections
+import json, collections, sys
+from dataset_io import load_jsonl
 
-with open('data/train.jsonl') as f:
-    rows = [json.loads(l) for l in f]
+# Optional filter: python inspect_data.py <batch or generator>  (needs --meta data)
+source = sys.argv[1] if len(sys.argv) > 1 else None
+rows = load_jsonl('data/train.jsonl')
+if source:
+    rows = [r for r in rows if source in (r.get('meta', {}).get('batch'), r.get('meta', {}).get('generator'))]
+    print(f'Filtered to source {source!r}')
+
+by_source = collections.Counter(r['meta']['generator'] for r in rows if 'meta' in r)
 
 tool_calls = collections.Counter()
 for r in rows:
@@ -12,6 +19,11 @@ for r in rows:
 print('Total examples:', len(rows))
 avg = sum(len(r['messages']) for r in rows) / len(rows)
 print('Avg messages per example:', round(avg, 1))
+if by_source:
+    print()
+    print('Source distribution (top 15):')
+    for name, count in by_source.most_common(15):
+        print(f'  {name:<45} {count:5d}')
 print()
 print('Tool call distribution:')
 for name, count in sorted(tool_calls.items(), key=lambda x: -x[1]):
@@ -54,6 +66,5 @@ if multi:
 
 print()
 print('=== Eval set ===')
-with open('data/eval.jsonl') as f:
-    eval_rows = [json.loads(l) for l in f]
+eval_rows = load_jsonl('data/eval.jsonl')
 print('Eval examples:', len(eval_rows))
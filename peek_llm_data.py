@@ -1,8 +1,9 @@
-import json, random
-lines = open('data/llm_train.jsonl', encoding='utf-8').readlines()
-sample = random.sample(lines, min(10, len(lines)))
-for i, l in enumerate(sample):
-    ex = json.loads(l)
+import random
+from dataset_io import load_jsonl
+
+examples = load_jsonl('data/llm_train.jsonl')
+sample = random.sample(examples, min(10, len(examples)))
+for i, ex in enumerate(sample):
     prompt = ex["messages"][1]["content"]
     response = ex["messages"][2]["content"]
     print(f"--- Example {i+1} ---")
@@ -49,6 +49,12 @@ files = [
     ("generate_dataset.py", "generate_dataset.py"),
 ]
 
+# Sharded datasets (generate_dataset.py --shards): the index plus every shard
+from dataset_io import shard_files
+for index in ("data/train.shards.json", "data/eval.shards.json"):
+    if Path(index).exists():
+        files += [(path, "data/" + Path(path).name) for path in [index] + shard_files(index)]
+
 for local, remote in files:
     if Path(local).exists():
         api.upload_file(
@@ -97,21 +97,21 @@ print(f"   Trainable params: {sum(p.numel() for p in model.parameters() if p.req
 
 # ── Load dataset ───────────────────────────────────────────────────────────
 
+from functools import lru_cache
 from datasets import Dataset
+from dataset_io import load_jsonl  # plain, compact, sharded or Parquet
 
-def load_jsonl(path):
-    rows = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                rows.append(json.loads(line))
-    return rows
+@lru_cache(maxsize=None)
+def parse_tools(tools_json):
+    # Parquet datasets store the tools array as a JSON string (see dataset_parquet.py)
+    return json.loads(tools_json)
 
 def format_example(example):
     """Convert our ChatML-with-tools format to a single training string."""
     messages = example["messages"]
     tools = example.get("tools", None)
+    if isinstance(tools, str):
+        tools = parse_tools(tools)
     kwargs = dict(tools=tools, tokenize=False, add_generation_prompt=False)
     # Qwen3: disable thinking mode for fast tool execution
     if "qwen3" in args.model:
@@ -119,13 +119,23 @@ def format_example(example):
     text = tokenizer.apply_chat_template(messages, **kwargs)
     return {"text": text}
 
-train_data = load_jsonl(args.data)
-train_dataset = Dataset.from_list(train_data).map(format_example)
+def without_meta(example):
+    """Drop the provenance field (generate_dataset.py --meta); it isn't training text."""
+    example.pop("meta", None)
+    return example
+
+def load_split(path):
+    """Dataset for a data file. Parquet goes straight into Arrow, with no JSON parsing."""
+    if str(path).endswith(".parquet"):
+        dataset = Dataset.from_parquet(str(path))
+        return dataset.remove_columns([c for c in ("meta",) if c in dataset.column_names])
+    return Dataset.from_list([without_meta(e) for e in load_jsonl(path)])
+
+train_dataset = load_split(args.data).map(format_example)
 
 eval_dataset = None
 if Path(args.eval_data).exists():
-    eval_data = load_jsonl(args.eval_data)
-    eval_dataset = Dataset.from_list(eval_data).map(format_example)
+    eval_dataset = load_split(args.eval_data).map(format_example)
     print(f"   Train: {len(train_dataset)} | Eval: {len(eval_dataset)}")
 else:
     print(f"   Train: {len(train_dataset)} (no eval set found)")